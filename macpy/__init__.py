@@ -14,6 +14,14 @@ from .event import KeyboardEvent, HotKey, HotString
 from .event import PointerEventMotion, PointerEventButton, PointerEventAxis
 from .types.metawindow import MetaWindow
 from .platform import PLATFORM, Platform
+from .interface.reactor import Reactor
+from .types.stream import running_loop, completion
+from .types.hookqueue import QueuePolicy, HookQueue, warn_slow
+from .types.meter import measure_injection
+from .types.trace import Tracer
+from .types.recorder import RecordStream, FlightRecorder
+from .types.recording import Recording, RecordingWriter, select
+from .types.scheduler import Scheduler
 # ~ PLATFORM = Platform.WAYLAND
 if PLATFORM is Platform.WINDOWS:
 	from .interface.winkeyboard import WinKeyboard
@@ -31,7 +39,9 @@ else:
 __all__ = ('Key', 'KeyState', 'PointerAxis', 'WindowEventType', 'WindowState',
 	'Event', 'WindowEvent', 'KeyboardEvent', 'HotKey', 'HotString',
 	'PointerEventMotion', 'PointerEventButton', 'PointerEventAxis',
-	'Keyboard', 'Pointer', 'Window', 'RecordType', 'record', 'replay')
+	'Keyboard', 'Pointer', 'Window', 'RecordType', 'QueuePolicy', 'record',
+	'record_stream', 'flight_recorder', 'Replayer', 'replay', 'use_reactor',
+	'start_trace', 'stop_trace')
 
 
 class Keyboard(object):
@@ -41,7 +51,13 @@ class Keyboard(object):
 	physical keyboards.
 	"""
 
-	def __init__(self):
+	def __init__(self, slow_callback=None):
+		"""Keyboard interface object.
+
+		Args:
+			slow_callback (float): If set, callbacks of this object that run
+				longer than this many seconds are reported on stdout.
+		"""
 
 		if PLATFORM is Platform.WINDOWS:
 			self._interface = WinKeyboard()
@@ -49,6 +65,19 @@ class Keyboard(object):
 			self._interface = EvKeyboard()
 		else:
 			self._interface = XKeyboard()
+		self._slow_callback = slow_callback
+
+	def _wrap(self, callback, executor=None):
+
+		if self._slow_callback is not None:
+			callback = warn_slow(callback, self._slow_callback)
+		if executor is not None:
+			# Calls for one callback go through its own queue so they run
+			# one after another and in order, whichever worker picks them up
+			callback = HookQueue(
+				callback, self._interface.dispatch, None,
+				executor=executor).push
+		return callback
 
 	def close(self):
 		"""Close opened resources and cleanly exit mainloop.
@@ -69,7 +98,9 @@ class Keyboard(object):
 
 		return self._interface.get_key_state(key)
 
-	def install_keyboard_hook(self, callback, grab=False):
+	def install_keyboard_hook(
+			self, callback, grab=False, maxsize=0, policy=QueuePolicy.BLOCK,
+			executor=None):
 		"""Installs a low level hook that sends all keyboard input to
 		the callback.
 
@@ -86,9 +117,86 @@ class Keyboard(object):
 					allowed on Windows.
 
 					Under wayland this option does nothing.
+			maxsize (int): How many events may wait for the callback. The
+				default of 0 lets the queue grow without limit.
+			policy (.QueuePolicy): What to do with new events once maxsize
+				events are waiting. On Windows :attr:`~.QueuePolicy.BLOCK`
+				drops the oldest event instead of waiting, since the hook
+				would hold up input of the whole system.
+			executor (concurrent.futures.Executor): Run the callback on this
+				executor instead of the interface's mainloop, so a slow
+				callback doesn't hold up simulated input. Events are still
+				passed to the callback one at a time and in order.
+		"""
+
+		self._interface.install_keyboard_hook(
+			self._wrap(callback), grab=grab, maxsize=maxsize, policy=policy,
+			executor=executor)
+
+	def queue_stats(self):
+		"""Return event counters of the keyboard hook's queue.
+
+		Returns:
+			tuple: A namedtuple of ``queued``, ``dropped`` and ``coalesced``
+				event counts and the number of events still ``pending``.
+		"""
+
+		return self._interface.queue_stats()
+
+	def enable_stats(self, enable=True):
+		"""Start or stop collecting latency statistics of this keyboard.
+
+		Collecting costs a few timestamps per event, while stopped it costs
+		nothing. Starting again resets the statistics.
+
+		Args:
+			enable (bool): Whether to collect statistics.
 		"""
 
-		self._interface.install_keyboard_hook(callback, grab=grab)
+		self._interface.enable_stats(enable)
+
+	def stats(self):
+		"""Return latency statistics collected since :meth:`enable_stats`.
+
+		Latencies are :class:`~macpy.types.meter.Histogram` objects of
+		the time from the event's source to the hook, from the hook to
+		the callback, spent in the callback and from simulating input until
+		it was sent.
+
+		Returns:
+			tuple: A namedtuple of ``source_to_hook``, ``hook_to_dispatch``,
+				``callback`` and ``injection`` histograms, the highest number
+				of events that waited for the hook callback as
+				``queue_high_water`` and ``events_per_second``, or
+				:obj:`None` if statistics are not enabled.
+		"""
+
+		return self._interface.stats()
+
+	def events(self, grab=False):
+		"""Stream keyboard events to the running :mod:`asyncio` loop.
+
+		This installs a keyboard hook and returns an asynchronous iterator
+		over its events, use it as ``async for event in keyboard.events()``.
+		Leaving an ``async with`` block around the stream or calling its
+		``close()`` method uninstalls the hook again.
+
+		Under X11 the display connection is read by the loop itself, reading
+		pauses while too many events are waiting to be consumed. On other
+		platforms events are handed over from the hook thread.
+
+		Args:
+			grab (bool): See :meth:`install_keyboard_hook`.
+		Returns:
+			An asynchronous iterator of :class:`~macpy.event.KeyboardEvent`.
+		Raises:
+			RuntimeError: If there is no running event loop.
+		"""
+
+		loop = running_loop()
+		if loop is None:
+			raise RuntimeError('events() must be called from a running loop')
+		return self._interface.events(loop, grab)
 
 	def uninstall_keyboard_hook(self):
 		"""Uninstall keyboard hook and stop hook's loop.
@@ -117,7 +225,7 @@ class Keyboard(object):
 
 		self._interface.uninit_hotkeys()
 
-	def register_hotkey(self, key, modifiers, callback):
+	def register_hotkey(self, key, modifiers, callback, executor=None):
 		"""Register a key combination that once pressed triggers callback.
 
 		Note:
@@ -134,11 +242,16 @@ class Keyboard(object):
 				and :attr:`~macpy.key.Key.KEY_META`.
 			callback (Callable): Callable which will be called
 				with :class:`~macpy.event.HotKey` object as a single argument.
+			executor (concurrent.futures.Executor): Run the callback on this
+				executor instead of the interface's mainloop, so a slow
+				callback doesn't hold up simulated input. Presses are still
+				passed to the callback one at a time and in order.
 		Returns:
 			~macpy.event.HotKey: A hotkey object.
 		"""
 
-		return self._interface.register_hotkey(key, modifiers, callback)
+		return self._interface.register_hotkey(
+			key, modifiers, self._wrap(callback, executor))
 
 	def unregister_hotkey(self, hotkey):
 		"""Unegister a previously registered hotkey.
@@ -150,7 +263,7 @@ class Keyboard(object):
 
 		self._interface.unregister_hotkey(hotkey)
 
-	def register_hotstring(self, string, triggers, callback):
+	def register_hotstring(self, string, triggers, callback, executor=None):
 		"""Register a string that once typed will trigger callback.
 
 		If triggers are empty, the string will trigger as soon as it's typed.
@@ -165,13 +278,18 @@ class Keyboard(object):
 				after the string.
 			callback (Callable): A callable that will be called
 				with :class:`~macpy.event.HotString` as a single argument.
+			executor (concurrent.futures.Executor): Run the callback on this
+				executor instead of the interface's mainloop, so a slow
+				callback doesn't hold up simulated input. Matches are still
+				passed to the callback one at a time and in order.
 		Returns:
 			~macpy.event.HotString: A hotstring object.
 		Raises:
 			RuntimeError
 		"""
 
-		return self._interface.register_hotstring(string, triggers, callback)
+		return self._interface.register_hotstring(
+			string, triggers, self._wrap(callback, executor))
 
 	def unregister_hotstring(self, hotstring):
 		"""Unregister a previously registered hotstring.
@@ -191,9 +309,14 @@ class Keyboard(object):
 			state (~macpy.key.KeyState): The state to simulate. If state
 				is :obj:`None` (default), both key press and release are
 				simulated.
+		Returns:
+			When called from a running :mod:`asyncio` loop, a future that
+			resolves once the event was sent, :obj:`None` otherwise.
 		"""
 
 		self._interface.keypress(key, state)
+		measure_injection(self._interface)
+		return completion(self._interface)
 
 	def type(self, string):
 		"""Type a given string.
@@ -203,9 +326,14 @@ class Keyboard(object):
 
 		Args:
 			string (str): String to type.
+		Returns:
+			When called from a running :mod:`asyncio` loop, a future that
+			resolves once the whole string was typed, :obj:`None` otherwise.
 		"""
 
 		self._interface.type(string)
+		measure_injection(self._interface)
+		return completion(self._interface)
 
 
 class Pointer(object):
@@ -215,7 +343,13 @@ class Pointer(object):
 	physical pointing devices.
 	"""
 
-	def __init__(self):
+	def __init__(self, slow_callback=None):
+		"""Pointer interface object.
+
+		Args:
+			slow_callback (float): If set, callbacks of this object that run
+				longer than this many seconds are reported on stdout.
+		"""
 
 		if PLATFORM is Platform.WINDOWS:
 			self._interface = WinPointer()
@@ -223,6 +357,7 @@ class Pointer(object):
 			self._interface = EvPointer()
 		else:
 			self._interface = XPointer()
+		self._slow_callback = slow_callback
 
 	def close(self):
 		"""Close opened resources and cleanly exit mainloop.
@@ -232,7 +367,9 @@ class Pointer(object):
 
 		self._interface.close()
 
-	def install_pointer_hook(self, callback, grab=False):
+	def install_pointer_hook(
+			self, callback, grab=False, maxsize=0, policy=QueuePolicy.BLOCK,
+			executor=None):
 		"""Installs a low level hook that sends all pointer events to
 		the callback.
 
@@ -251,9 +388,84 @@ class Pointer(object):
 					allowed on Windows.
 
 					Under wayland this option does nothing.
+			maxsize (int): How many events may wait for the callback. The
+				default of 0 lets the queue grow without limit.
+			policy (.QueuePolicy): What to do with new events once maxsize
+				events are waiting. :attr:`~.QueuePolicy.COALESCE` keeps
+				only the latest of consecutive motion events, so the callback
+				always sees the current pointer position. On Windows
+				:attr:`~.QueuePolicy.BLOCK` drops the oldest event instead of
+				waiting, since the hook would hold up input of the whole
+				system.
+			executor (concurrent.futures.Executor): Run the callback on this
+				executor instead of the interface's mainloop, so a slow
+				callback doesn't hold up simulated input. Events are still
+				passed to the callback one at a time and in order.
+		"""
+
+		if self._slow_callback is not None:
+			callback = warn_slow(callback, self._slow_callback)
+		self._interface.install_pointer_hook(
+			callback, grab=grab, maxsize=maxsize, policy=policy,
+			executor=executor)
+
+	def queue_stats(self):
+		"""Return event counters of the pointer hook's queue.
+
+		Returns:
+			tuple: A namedtuple of ``queued``, ``dropped`` and ``coalesced``
+				event counts and the number of events still ``pending``.
 		"""
 
-		self._interface.install_pointer_hook(callback, grab=grab)
+		return self._interface.queue_stats()
+
+	def enable_stats(self, enable=True):
+		"""Start or stop collecting latency statistics of this pointer.
+
+		Collecting costs a few timestamps per event, while stopped it costs
+		nothing. Starting again resets the statistics.
+
+		Args:
+			enable (bool): Whether to collect statistics.
+		"""
+
+		self._interface.enable_stats(enable)
+
+	def stats(self):
+		"""Return latency statistics collected since :meth:`enable_stats`.
+
+		Latencies are :class:`~macpy.types.meter.Histogram` objects of
+		the time from the event's source to the hook, from the hook to
+		the callback, spent in the callback and from simulating input until
+		it was sent.
+
+		Returns:
+			tuple: A namedtuple of ``source_to_hook``, ``hook_to_dispatch``,
+				``callback`` and ``injection`` histograms, the highest number
+				of events that waited for the hook callback as
+				``queue_high_water`` and ``events_per_second``, or
+				:obj:`None` if statistics are not enabled.
+		"""
+
+		return self._interface.stats()
+
+	def events(self, grab=False):
+		"""Stream pointer events to the running :mod:`asyncio` loop.
+
+		Works like :meth:`Keyboard.events`, see there for details.
+
+		Args:
+			grab (bool): See :meth:`install_pointer_hook`.
+		Returns:
+			An asynchronous iterator of pointer events.
+		Raises:
+			RuntimeError: If there is no running event loop.
+		"""
+
+		loop = running_loop()
+		if loop is None:
+			raise RuntimeError('events() must be called from a running loop')
+		return self._interface.events(loop, grab)
 
 	def uninstall_pointer_hook(self):
 		"""Uninstalls pointer hook and stops hook's loop.
@@ -274,9 +486,14 @@ class Pointer(object):
 			y (int): Y coordinate.
 			relative (bool): Whether given coordinates are absolute or relative
 				to current pointer position.
+		Returns:
+			When called from a running :mod:`asyncio` loop, a future that
+			resolves once the pointer was warped, :obj:`None` otherwise.
 		"""
 
 		self._interface.warp(x, y, relative)
+		measure_injection(self._interface)
+		return completion(self._interface)
 
 	def scroll(self, axis, value):
 		"""Simulate mouse scroll wheel along the given axis.
@@ -290,6 +507,7 @@ class Pointer(object):
 		"""
 
 		self._interface.scroll(axis, value)
+		measure_injection(self._interface)
 
 	def click(self, key, state=None):
 		"""Simulate a mouse click.
@@ -301,6 +519,7 @@ class Pointer(object):
 		"""
 
 		self._interface.click(key, state)
+		measure_injection(self._interface)
 
 	def get_button_state(self, button):
 		"""Check whether the button is pressed or released.
@@ -366,7 +585,11 @@ class Window(with_metaclass(MetaWindow)):
 	@classmethod
 	def _redirect(cls, event):
 
-		cls._callback(WindowEvent(cls(event.window), event.type))
+		window_event = WindowEvent(cls(event.window), event.type)
+		window_event.time = event.time
+		window_event.source_time = event.source_time
+		window_event.dispatch_time = event.dispatch_time
+		cls._callback(window_event)
 
 	@classmethod
 	def install_window_hook(cls, callback):
@@ -388,7 +611,30 @@ class Window(with_metaclass(MetaWindow)):
 			raise NotImplementedError('Unsupported platform')
 
 	@classmethod
-	def uninstall_window_hook(self):
+	def events(cls):
+		"""Stream window events to the running :mod:`asyncio` loop.
+
+		Works like :meth:`Keyboard.events`, closing the stream removes
+		the window hook.
+
+		Returns:
+			An asynchronous iterator of :class:`~macpy.event.WindowEvent`.
+		Raises:
+			RuntimeError: If there is no running event loop.
+			NotImplementedError
+		"""
+
+		if not cls._interface:
+			raise NotImplementedError('Unsupported platform')
+		loop = running_loop()
+		if loop is None:
+			raise RuntimeError('events() must be called from a running loop')
+		stream = cls._interface.events(loop, cls._redirect)
+		cls._callback = stream.push
+		return stream
+
+	@classmethod
+	def uninstall_window_hook(cls):
 		"""Remove window hook.
 
 		Since hook runs in a separate thread, you should call this method
@@ -403,6 +649,93 @@ class Window(with_metaclass(MetaWindow)):
 		else:
 			raise NotImplementedError('Unsupported platform')
 
+	@classmethod
+	def enable_cache(cls):
+		"""Cache window properties until the window reports they changed.
+
+		Once enabled, :attr:`title`, :attr:`wm_class`, :attr:`pid`,
+		:attr:`state`, :attr:`position`, :attr:`size` and :meth:`get_active`
+		are served from memory after the first lookup. Cached values are
+		dropped as soon as the window notifies about a change, so they are
+		never stale for longer than it takes the notification to arrive.
+		Under windows properties are always read from the window and this
+		does nothing.
+
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			cls._interface.enable_cache()
+		else:
+			raise NotImplementedError('Unsupported platform')
+
+	@classmethod
+	def disable_cache(cls):
+		"""Disable and clear the window property cache.
+
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			cls._interface.disable_cache()
+		else:
+			raise NotImplementedError('Unsupported platform')
+
+	@classmethod
+	def enable_stats(cls, enable=True):
+		"""Start or stop collecting latency statistics of the window hook.
+
+		See :meth:`Keyboard.enable_stats`.
+
+		Args:
+			enable (bool): Whether to collect statistics.
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			cls._interface.enable_stats(enable)
+		else:
+			raise NotImplementedError('Unsupported platform')
+
+	@classmethod
+	def stats(cls):
+		"""Return latency statistics of the window hook.
+
+		See :meth:`Keyboard.stats`. Window events are not queued and
+		nothing is simulated, so only ``source_to_hook``, ``callback`` and
+		``events_per_second`` carry information.
+
+		Returns:
+			tuple: A namedtuple of statistics or :obj:`None` if statistics
+				are not enabled.
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			return cls._interface.stats()
+		else:
+			raise NotImplementedError('Unsupported platform')
+
+	@classmethod
+	def cache_stats(cls):
+		"""Return window property cache counters.
+
+		Returns:
+			tuple: A namedtuple of ``hits``, ``misses`` and ``invalidations``
+				or :obj:`None` if the cache is not enabled.
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			return cls._interface.cache_stats()
+		else:
+			raise NotImplementedError('Unsupported platform')
+
 	@classmethod
 	def list_windows(cls):
 		"""Return a tuple of currently open window objects.
@@ -418,6 +751,39 @@ class Window(with_metaclass(MetaWindow)):
 		else:
 			raise NotImplementedError('Unsupported platform')
 
+	@classmethod
+	def snapshot(cls, fields=('title', 'wm_class', 'pid', 'geometry', 'state')):
+		"""Fetch properties of all open windows in bulk.
+
+		This is much faster than calling :meth:`list_windows` and reading
+		attributes of every window, especially over a slow connection,
+		since all requests are sent before any reply is awaited.
+
+		Args:
+			fields ((str, ....)): Properties to fetch. Valid fields are
+				``'title'``, ``'wm_class'``, ``'pid'``, ``'geometry'`` and
+				``'state'``.
+		Returns:
+			(tuple, ....): A tuple of namedtuples with ``id``, ``title``,
+				``wm_class``, ``pid``, ``geometry`` and ``state`` members,
+				one per open window. ``id`` is the platform window handle and
+				fields that were not requested or are not set are
+				:obj:`None`.
+		Raises:
+			ValueError
+			NotImplementedError
+		"""
+
+		fields = frozenset(fields)
+		invalid = fields - {'title', 'wm_class', 'pid', 'geometry', 'state'}
+		if invalid:
+			raise ValueError('Invalid fields: {0}'.format(
+				', '.join(sorted(invalid))))
+		if cls._interface:
+			return cls._interface.snapshot(fields)
+		else:
+			raise NotImplementedError('Unsupported platform')
+
 	@classmethod
 	def get_active(cls):
 		"""Return currently focused window.
@@ -482,7 +848,8 @@ class Window(with_metaclass(MetaWindow)):
 		"""Return the first window whose :attr:`title` matches title.
 
 		Args:
-			title (str): Partial window title to match.
+			title (str): Partial window title to match. A compiled regular
+				expression may be passed instead.
 		Returns:
 			.Window: A window object.
 		Raises:
@@ -498,6 +865,52 @@ class Window(with_metaclass(MetaWindow)):
 		else:
 			raise NotImplementedError
 
+	@classmethod
+	def get_by_pid(cls, pid):
+		"""Return the first window that belongs to the process with given PID.
+
+		Args:
+			pid (int): Process ID to match.
+		Returns:
+			.Window: A window object.
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			window = cls._interface.get_by_pid(pid)
+			if window:
+				return cls(window)
+			else:
+				return None
+		else:
+			raise NotImplementedError('Unsupported platform')
+
+	@classmethod
+	def find_all(cls, wm_class=None, title=None, pid=None):
+		"""Return every window that matches all of the given criteria.
+
+		While the window hook is installed, lookups are answered from an index
+		kept up to date by the hook, without querying the window system.
+
+		Args:
+			wm_class (str): Window class to match.
+			title (str): Partial window title to match. A compiled regular
+				expression may be passed instead, in which case it is
+				searched for in window titles.
+			pid (int): Process ID to match.
+		Returns:
+			(.Window, ....): A tuple of matching windows.
+		Raises:
+			NotImplementedError
+		"""
+
+		if cls._interface:
+			return tuple(cls(window) for window
+				in cls._interface.find_all(wm_class, title, pid))
+		else:
+			raise NotImplementedError('Unsupported platform')
+
 	@property
 	def state(self):
 		"""This window's state.
@@ -620,9 +1033,29 @@ class RecordType(Enum):
 	BOTH = auto()
 
 
-def record(record_type, stop_key=None, timer=None):
+def _record_hooks(record_type, callback):
+
+	if not isinstance(record_type, RecordType):
+		raise TypeError('Unsupported record type')
+	interfaces = []
+	if record_type is RecordType.KEYBOARD or record_type is RecordType.BOTH:
+		keyboard = Keyboard()
+		keyboard.install_keyboard_hook(callback)
+		interfaces.append(keyboard)
+	if record_type is RecordType.POINTER or record_type is RecordType.BOTH:
+		pointer = Pointer()
+		pointer.install_pointer_hook(callback)
+		interfaces.append(pointer)
+	return interfaces
+
+
+def record(record_type, stop_key=None, timer=None, filename=None):
 	"""Record events of record_type and return a list.
 
+	If filename is given, events are written to that file as they arrive
+	instead of being kept in memory, in a compact binary format that
+	:class:`~macpy.types.recording.Recording` reads.
+
 	Args:
 		record_type (RecordType): The type of events to record.
 		stop_key (~macpy.key.Key): The key or button which will end the
@@ -630,77 +1063,255 @@ def record(record_type, stop_key=None, timer=None):
 			until timer runs out.
 		timer (float): The duration of recording session. If timer is
 			:obj:`None` the session will go on until specified key is pressed.
+		filename (str): Path of a file to record to.
 	Returns:
-		[~macpy.event.Event]: A list of recorded events.
+		[~macpy.event.Event]: A list of recorded events or, if filename was
+		given, the :class:`~macpy.types.recording.Recording` of that file.
 	"""
 
-	def process_event(event):
+	stream = record_stream(record_type, stop_key, timer)
+	if filename is None:
+		return list(stream)
+	with RecordingWriter(filename) as writer:
+		for event in stream:
+			writer.write(event)
+	return Recording(filename)
 
-		nonlocal stop
-		if isinstance(event, KeyboardEvent):
-			if event.key == stop_key:
-				stop = True
-				return
-		elif isinstance(event, PointerEventButton):
-			if event.button == stop_key:
-				stop = True
-				return
-		event_list.append(event)
 
-	event_list = []
-	stop = False
+def record_stream(record_type, stop_key=None, timer=None):
+	"""Record events of record_type and yield them as they arrive.
 
-	if not isinstance(record_type, RecordType):
-		raise TypeError('Unsupported record type')
-	if record_type is RecordType.KEYBOARD or record_type is RecordType.BOTH:
-		keyboard = Keyboard()
-		keyboard.install_keyboard_hook(process_event)
-	if record_type is RecordType.POINTER or record_type is RecordType.BOTH:
-		pointer = Pointer()
-		pointer.install_pointer_hook(process_event)
+	Unlike :func:`record` nothing is kept in memory once an event was
+	yielded, so this suits long sessions that write events out as they
+	go. The recording ends when stop_key is pressed, timer runs out or
+	``stop()`` is called on the returned stream, which also happens when
+	leaving a ``with`` block around it::
 
-	if timer is None:
-		while not stop:
-			time.sleep(0.005)
-	else:
-		time.sleep(timer)
+		with macpy.record_stream(macpy.RecordType.BOTH) as stream:
+			for event in stream:
+				...
 
-	if record_type is RecordType.KEYBOARD or record_type is RecordType.BOTH:
-		keyboard.close()
-	if record_type is RecordType.POINTER or record_type is RecordType.BOTH:
-		pointer.close()
+	Args:
+		record_type (RecordType): The type of events to record.
+		stop_key (~macpy.key.Key): The key or button which will end the
+			recording, it is not yielded itself.
+		timer (float): The duration of recording session.
+	Returns:
+		~macpy.types.recorder.RecordStream: An iterator of recorded events.
+	"""
 
-	return event_list
+	stream = RecordStream((), stop_key, timer)
+	stream.interfaces = _record_hooks(record_type, stream.push)
+	return stream
 
 
-def replay(event_list, delay=0):
-	"""Replay events from a sequence.
+def flight_recorder(record_type, size=10000, seconds=None):
+	"""Keep recording the most recent events of record_type.
+
+	Meant to be left running to find out what led up to a failure:
+	only the last size events are kept in storage allocated up front.
+	Call ``snapshot()`` on the returned recorder to get them and
+	``close()`` to stop recording.
 
 	Args:
-		event_list ([~macpy.event.Event]): A sequence of events.
-		delay (float): The seconds to wait between each event (or pair).
+		record_type (RecordType): The type of events to record.
+		size (int): How many events to keep at most.
+		seconds (float): If given, snapshots only contain events from
+			that many seconds before they were taken.
+	Returns:
+		~macpy.types.recorder.FlightRecorder: The running recorder.
 	"""
 
-	keyboard = Keyboard()
-	pointer = Pointer()
+	recorder = FlightRecorder((), size, seconds)
+	recorder.interfaces = _record_hooks(record_type, recorder.push)
+	return recorder
 
-	for event in event_list:
-		if isinstance(event, KeyboardEvent):
-			keyboard.keypress(event.key, event.state)
-			if event.state is KeyState.RELEASED:
-				time.sleep(delay)
-		elif isinstance(event, PointerEventMotion):
-			pointer.warp(event.position.x, event.position.y)
-			time.sleep(delay)
-		elif isinstance(event, PointerEventButton):
-			pointer.click(event.button, event.state)
-			if event.state is KeyState.RELEASED:
+
+class Replayer(object):
+	"""Replays event sequences with one set of interface objects.
+
+	:func:`replay` sets up a :class:`Keyboard` and a :class:`Pointer` for
+	every call, which means new connections, keymaps and threads. This
+	creates them once when first needed and keeps them until it's closed,
+	so replaying many short sequences is faster. Used as a context
+	manager, leaving the block closes it.
+	"""
+
+	def __init__(self):
+
+		self._keyboard = None
+		self._pointer = None
+
+	@property
+	def keyboard(self):
+		"""The :class:`Keyboard` used to replay keyboard events.
+		"""
+
+		if self._keyboard is None:
+			self._keyboard = Keyboard()
+		return self._keyboard
+
+	@property
+	def pointer(self):
+		"""The :class:`Pointer` used to replay pointer events.
+		"""
+
+		if self._pointer is None:
+			self._pointer = Pointer()
+		return self._pointer
+
+	def replay(self, event_list, delay=None, start=None, end=None, speed=None):
+		"""Replay events from a sequence.
+
+		Events are sent at the times they were recorded at, counted from
+		the first one. The wait before each is mostly slept and spun for
+		the last moment, so events are usually sent well within
+		a millisecond of when they're due. Each is scheduled from the start
+		of the replay, so a late event doesn't delay the rest.
+
+		With start or end only part of the events is replayed. Keys and
+		buttons held at start are pressed first and those still held at
+		end are released afterwards, so modifiers aren't missing or stuck.
+		A :class:`~macpy.types.recording.Recording` finds start and end
+		with its time index instead of reading every event before them.
+
+		Args:
+			event_list ([~macpy.event.Event]): A sequence of events, this may
+				also be a :class:`~macpy.types.recording.Recording`.
+			delay (float): If given, timestamps are ignored and this many
+				seconds are waited after each release, motion or scroll
+				instead.
+			start (float): Seconds after the first event to start replaying at.
+			end (float): Seconds after the first event to stop replaying at.
+			speed (float): How many times faster than recorded to replay,
+				1 by default. This can't be combined with delay.
+		Returns:
+			~macpy.types.scheduler.ReplayStats: A namedtuple of the number of
+			events replayed, the seconds it took, a
+			:class:`~macpy.types.meter.Histogram` of how late each event was
+			sent and how late the last one was. If delay was given this is
+			:obj:`None`.
+		Raises:
+			ValueError: If both delay and speed were given.
+		"""
+
+		if delay is not None and speed is not None:
+			raise ValueError('Speed only applies without delay')
+		if start is not None or end is not None:
+			event_list = select(event_list, start, end)
+		scheduler = None
+		if delay is None:
+			scheduler = Scheduler(1.0 if speed is None else speed)
+
+		for event in event_list:
+			if scheduler is not None:
+				scheduler.wait(event.time)
+			if isinstance(event, KeyboardEvent):
+				self.keyboard.keypress(event.key, event.state)
+				pause = event.state is KeyState.RELEASED
+			elif isinstance(event, PointerEventMotion):
+				self.pointer.warp(event.position.x, event.position.y)
+				pause = True
+			elif isinstance(event, PointerEventButton):
+				self.pointer.click(event.button, event.state)
+				pause = event.state is KeyState.RELEASED
+			elif isinstance(event, PointerEventAxis):
+				self.pointer.scroll(event.axis, event.value)
+				pause = True
+			else:
+				raise TypeError('Unsupported event')
+			if pause and delay:
 				time.sleep(delay)
-		elif isinstance(event, PointerEventAxis):
-			pointer.scroll(event.axis, event.value)
-			time.sleep(delay)
-		else:
-			raise TypeError('Unsupported event')
 
-	keyboard.close()
-	pointer.close()
+		if scheduler is not None:
+			return scheduler.stats()
+
+	def close(self):
+		"""Close the interface objects.
+		"""
+
+		if self._keyboard is not None:
+			self._keyboard.close()
+			self._keyboard = None
+		if self._pointer is not None:
+			self._pointer.close()
+			self._pointer = None
+
+	def __enter__(self):
+
+		return self
+
+	def __exit__(self, exc_type, exc, traceback):
+
+		self.close()
+
+
+def replay(event_list, delay=None, start=None, end=None, speed=None):
+	"""Replay events from a sequence.
+
+	This creates and closes the :class:`Keyboard` and :class:`Pointer`
+	it needs, use a :class:`Replayer` to replay many sequences.
+	Arguments and return value are those of :meth:`Replayer.replay`.
+	"""
+
+	with Replayer() as replayer:
+		return replayer.replay(event_list, delay, start, end, speed)
+
+
+def use_reactor(enable=True):
+	"""Run hooks and callbacks of interface objects on a single thread.
+
+	By default every :class:`Keyboard`, :class:`Pointer` and the window hook
+	start their own threads to wait for events and run callbacks. With
+	the reactor enabled, objects created afterwards register their
+	connections and devices with one shared reactor thread instead,
+	which also runs all callbacks and simulated input in order.
+	The reactor stops once the last object using it is closed.
+
+	Callbacks must not block when the reactor is used, since that delays
+	every other hook.
+
+	Note:
+		This has no effect on Windows. On Wayland libinput is still read on
+		a thread of its own.
+	Args:
+		enable (bool): Whether objects created from now on use the reactor.
+	"""
+
+	Reactor.enabled = enable
+
+
+def start_trace():
+	"""Start recording what every macpy thread spends its time on.
+
+	Parsing hook events, translating keys, waiting in queues and running
+	callbacks and simulated input are recorded as spans until
+	:func:`stop_trace` is called. Each thread writes to a buffer of its
+	own, so tracing doesn't make threads wait for each other.
+
+	Any trace that is already running is discarded.
+	"""
+
+	Tracer.active = Tracer()
+
+
+def stop_trace(filename):
+	"""Stop the trace started by :func:`start_trace` and save it.
+
+	The trace is written in the Chrome trace event format, which can be
+	opened in Perfetto or ``chrome://tracing``.
+
+	Args:
+		filename (str): Path of the JSON file to write.
+	Returns:
+		int: The number of trace events written.
+	Raises:
+		RuntimeError: If no trace is running.
+	"""
+
+	tracer = Tracer.active
+	if tracer is None:
+		raise RuntimeError('No trace is running')
+	Tracer.active = None
+	return tracer.write(filename)
+
@@ -9,7 +9,7 @@ try:
 	from time import monotonic
 except ImportError:
 	from monotonic import monotonic
-from .types.tuples import MousePos, Modifiers, Locks
+from .types.tuples import MousePos, Modifiers, Locks, MODIFIERS, LOCKS
 
 
 class PointerAxis(Enum):
@@ -39,23 +39,81 @@ class WindowState(Enum):
 	MAXIMIZED = auto()
 
 
+def intern_state(state, table, fields):
+
+	if isinstance(state, type(table[0])):
+		return state
+	if isinstance(state, int):
+		return table[state]
+	if isinstance(state, dict):
+		state = [state[name] for name in fields]
+	mask = 0
+	for bit, active in enumerate(state):
+		if active:
+			mask |= 1 << bit
+	return table[mask]
+
+
 class Event(object):
 	"""Base class for all macpy events.
 
+	All timestamps are in seconds on the clock of :func:`time.monotonic`,
+	so subtracting them gives the time an event spent in each stage.
+
 	Attributes:
-		time (:class:`float`): Event timestamp. This does not translate to
-			concrete time but timestamps of later events are guaranteed to be
-			greater than timestamps of earlier events.
+		time (:class:`float`): Event timestamp, taken when the hook received
+			the event. This does not translate to concrete time but timestamps
+			of later events are guaranteed to be greater than timestamps of
+			earlier events.
+		source_time (:class:`float`): When the X server or the kernel
+			generated the event or :obj:`None` if the platform doesn't
+			report it.
+		dispatch_time (:class:`float`): When the event was handed to
+			the callback or :obj:`None` if it wasn't dispatched yet.
 	"""
 
+	__slots__ = ('time', 'source_time', 'dispatch_time')
+
 	def __init__(self):
 
 		self.time = monotonic()
+		self.source_time = None
+		self.dispatch_time = None
+
+	def __getstate__(self):
+
+		# The same dict events had before they had slots, so pickles of
+		# either load with both
+		state = {}
+		for cls in type(self).__mro__:
+			for name in getattr(cls, '__slots__', ()):
+				if hasattr(self, name):
+					state[name] = getattr(self, name)
+		return state
+
+	def __setstate__(self, state):
+
+		if isinstance(state, tuple):
+			# Pickled by object.__reduce_ex__ as (__dict__, slots)
+			state = dict(state[0] or {}, **(state[1] or {}))
+		self.source_time = None
+		self.dispatch_time = None
+		for name, value in state.items():
+			if isinstance(value, Modifiers):
+				value = intern_state(tuple(value), MODIFIERS, Modifiers._fields)
+			elif isinstance(value, Locks):
+				value = intern_state(tuple(value), LOCKS, Locks._fields)
+			setattr(self, name, value)
 
 	def __repr__(self):
 
 		items = []
-		for name, attr in self.__dict__.items():
+		for cls in type(self).__mro__:
+			for name in getattr(cls, '__slots__', ()):
+				if not name.startswith('_') and hasattr(self, name):
+					items.append(
+						'{0}={1}'.format(name, repr(getattr(self, name))))
+		for name, attr in getattr(self, '__dict__', {}).items():
 			if not name.startswith('_'):
 				items.append('{0}={1}'.format(name, repr(attr)))
 		items.sort()
@@ -72,6 +130,8 @@ class PointerEventMotion(Event):
 			the time of this event.
 	"""
 
+	__slots__ = ('position', 'modifiers')
+
 	def __init__(self, x, y, modifiers):
 		"""Event representing pointer motion.
 
@@ -79,11 +139,13 @@ class PointerEventMotion(Event):
 			x (int): Pointer position on x axis in pixels.
 			y (int): Pointer position on y axis in pixels.
 			modifiers (dict): Modifier key state at the time of this event.
+				A :class:`~macpy.types.tuples.Modifiers` namedtuple or
+				a bitmask of its fields is also accepted.
 		"""
 
 		Event.__init__(self)
 		self.position = MousePos(x, y)
-		self.modifiers = Modifiers(**modifiers)
+		self.modifiers = intern_state(modifiers, MODIFIERS, Modifiers._fields)
 
 
 class PointerEventButton(Event):
@@ -97,6 +159,8 @@ class PointerEventButton(Event):
 			the time of this event.
 	"""
 
+	__slots__ = ('position', 'button', 'state', 'modifiers')
+
 	def __init__(self, x, y, button, state, modifiers):
 		"""Event representing button press/release.
 
@@ -107,13 +171,15 @@ class PointerEventButton(Event):
 			state (~macpy.key.KeyState): Whether the button was pressed or
 				released.
 			modifiers (dict): Modifier key state at the time of this event.
+				A :class:`~macpy.types.tuples.Modifiers` namedtuple or
+				a bitmask of its fields is also accepted.
 		"""
 
 		Event.__init__(self)
 		self.position = MousePos(x, y)
 		self.button = button
 		self.state = state
-		self.modifiers = Modifiers(**modifiers)
+		self.modifiers = intern_state(modifiers, MODIFIERS, Modifiers._fields)
 
 
 class PointerEventAxis(Event):
@@ -126,6 +192,8 @@ class PointerEventAxis(Event):
 			the time of this event.
 	"""
 
+	__slots__ = ('position', 'value', 'axis', 'modifiers')
+
 	def __init__(self, x, y, value, axis, modifiers):
 		"""Event representing scrolling.
 
@@ -136,13 +204,15 @@ class PointerEventAxis(Event):
 				value is platform-specific.
 			axis (.PointerAxis): The axis along which to scroll.
 			modifiers (dict): Modifier key state at the time of this event.
+				A :class:`~macpy.types.tuples.Modifiers` namedtuple or
+				a bitmask of its fields is also accepted.
 		"""
 
 		Event.__init__(self)
 		self.position = MousePos(x, y)
 		self.value = value
 		self.axis = axis
-		self.modifiers = Modifiers(**modifiers)
+		self.modifiers = intern_state(modifiers, MODIFIERS, Modifiers._fields)
 
 
 class KeyboardEvent(Event):
@@ -159,6 +229,8 @@ class KeyboardEvent(Event):
 			time of this event.
 	"""
 
+	__slots__ = ('key', 'state', 'char', 'modifiers', 'locks')
+
 	def __init__(self, key, state, char, modifiers, locks):
 		"""Event representing key press/release.
 
@@ -169,15 +241,19 @@ class KeyboardEvent(Event):
 			char (str): The character that will be typed. Currently this is
 				ignored, you can set it to :obj:`None`.
 			modifiers (dict): Modifier key state at the time of this event.
+				A :class:`~macpy.types.tuples.Modifiers` namedtuple or
+				a bitmask of its fields is also accepted.
 			locks (dict): Lock key state at the time of this event.
+				A :class:`~macpy.types.tuples.Locks` namedtuple or a bitmask
+				of its fields is also accepted.
 		"""
 
 		Event.__init__(self)
 		self.key = key
 		self.state = state
 		self.char = char
-		self.modifiers = Modifiers(**modifiers)
-		self.locks = Locks(**locks)
+		self.modifiers = intern_state(modifiers, MODIFIERS, Modifiers._fields)
+		self.locks = intern_state(locks, LOCKS, Locks._fields)
 
 
 class HotKey(Event):
@@ -191,6 +267,8 @@ class HotKey(Event):
 			also pressed.
 	"""
 
+	__slots__ = ('key', 'modifiers')
+
 	def __init__(self, key, modifiers):
 
 		Event.__init__(self)
@@ -224,6 +302,8 @@ class HotString(Event):
 			May be :obj:`None`.
 	"""
 
+	__slots__ = ('string', 'triggers', 'trigger')
+
 	def __init__(self, string, triggers, trigger=None):
 
 		Event.__init__(self)
@@ -254,6 +334,8 @@ class WindowEvent(Event):
 			the window.
 	"""
 
+	__slots__ = ('window', 'type')
+
 	def __init__(self, window, event_type):
 
 		Event.__init__(self)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+from __future__ import print_function
+import traceback
+from threading import Thread, Lock
+try:
+	from time import time, monotonic
+except ImportError:
+	from time import time
+	from monotonic import monotonic
+from selectors import DefaultSelector, EVENT_READ
+from evdev import ecodes, InputDevice, list_devices
+from .xhelper import XTranslate
+from .reactor import Reactor, ReaderHandle
+from ..types.wakeup import Wakeup
+from ..types.trace import traced
+
+
+def source_time(event):
+
+	# evdev stamps events with the wall clock, which may jump
+	return event.timestamp() - (time() - monotonic())
+
+
+class EvState(object):
+	# Pressed keys and lit LEDs of a set of evdev keyboards, updated from
+	# their event streams. Devices are only queried at startup and after
+	# the kernel reports dropped events, so the X modifier/lock mask is
+	# kept up to date without any syscalls per event.
+
+	def __init__(self, devices, translate):
+
+		self.devices = tuple(devices)
+		self.translate = translate
+		self.generation = None
+		self.keymask = ()
+		self.ledmask = {}
+		self.keys = {device.fd: set() for device in self.devices}
+		self.leds = {device.fd: set() for device in self.devices}
+		self.dropped = set()
+		self.pressed = [0] * (ecodes.KEY_MAX + 1)
+		self.held = [0] * 8
+		self.modmask = 0
+		self.lockmask = 0
+		self.map_masks()
+		self.resync()
+
+	def map_masks(self):
+
+		# X modifier bits set by each event code and lock bits set by each
+		# LED. Rebuilt whenever XTranslate reloads its keyboard mapping.
+		with self.translate.lock:
+			self.generation = self.translate.generation
+			min_keycode = self.translate.min_keycode
+			keymask = [0] * (ecodes.KEY_MAX + 1)
+			for mod, keycodes in self.translate.modmap.items():
+				for keycode in keycodes:
+					if keycode and 0 <= keycode - min_keycode < len(keymask):
+						keymask[keycode - min_keycode] |= \
+							self.translate.modmask[mod]
+			lockmask = self.translate.lockmask
+			self.ledmask = {
+				ecodes.LED_NUML: lockmask['NUMLOCK'],
+				ecodes.LED_CAPSL: lockmask['CAPSLOCK'],
+				ecodes.LED_SCROLLL: lockmask['SCROLLLOCK']}
+		self.keymask = keymask
+		self.held = [0] * 8
+		for code, count in enumerate(self.pressed):
+			if count:
+				self.press_mask(keymask[code], count)
+		self.modmask = self.held_mask()
+		self.lockmask = self.lit_mask()
+
+	def press_mask(self, mask, count):
+
+		held = self.held
+		while mask:
+			bit = (mask & -mask).bit_length() - 1
+			held[bit] += count
+			mask &= mask - 1
+
+	def held_mask(self):
+
+		mask = 0
+		for bit, count in enumerate(self.held):
+			if count > 0:
+				mask |= 1 << bit
+		return mask
+
+	def lit_mask(self):
+
+		mask = 0
+		for leds in self.leds.values():
+			for led in leds:
+				mask |= self.ledmask.get(led, 0)
+		return mask
+
+	def resync(self, device=None):
+
+		devices = self.devices if device is None else (device, )
+		for device in devices:
+			keys = set(device.active_keys())
+			for code in self.keys[device.fd] - keys:
+				self.set_key(code, False)
+			for code in keys - self.keys[device.fd]:
+				self.set_key(code, True)
+			self.keys[device.fd] = keys
+			self.leds[device.fd] = set(device.leds())
+		self.lockmask = self.lit_mask()
+
+	def set_key(self, code, pressed):
+
+		if not 0 <= code < len(self.pressed):
+			return
+		count = 1 if pressed else -1
+		self.pressed[code] += count
+		mask = self.keymask[code]
+		if mask:
+			self.press_mask(mask, count)
+			self.modmask = self.held_mask()
+
+	def update(self, device, event):
+
+		# Returns False for events that must be ignored because the kernel
+		# dropped part of the stream they belong to.
+		if self.generation != self.translate.generation:
+			self.map_masks()
+		fd = device.fd
+		if event.type == ecodes.EV_SYN:
+			if event.code == ecodes.SYN_DROPPED:
+				self.dropped.add(fd)
+			elif event.code == ecodes.SYN_REPORT and fd in self.dropped:
+				self.dropped.discard(fd)
+				self.resync(device)
+			return False
+		if fd in self.dropped:
+			return False
+		if event.type == ecodes.EV_KEY:
+			if event.value < 2:
+				keys = self.keys[fd]
+				if event.value and event.code not in keys:
+					keys.add(event.code)
+					self.set_key(event.code, True)
+				elif not event.value and event.code in keys:
+					keys.discard(event.code)
+					self.set_key(event.code, False)
+		elif event.type == ecodes.EV_LED:
+			if event.value:
+				self.leds[fd].add(event.code)
+			else:
+				self.leds[fd].discard(event.code)
+			self.lockmask = self.lit_mask()
+		return True
+
+	def is_pressed(self, code):
+
+		return 0 <= code < len(self.pressed) and self.pressed[code] > 0
+
+	@property
+	def mask(self):
+
+		return self.modmask | self.lockmask
+
+
+def is_keyboard(device):
+
+	# Anything reporting keys rather than only mouse, joystick or touch
+	# buttons, so media key nodes count too. Keyboards with a wheel,
+	# touchpad or trackpoint on the same node report axes as well, so
+	# those can't be used to tell them apart.
+	keys = device.capabilities().get(ecodes.EV_KEY, ())
+	return any(
+		code < ecodes.BTN_MISC or ecodes.KEY_OK <= code < ecodes.BTN_DPAD_UP
+		for code in keys)
+
+
+class EvKeyboardState(Thread):
+	# Process-wide reader of every keyboard and the EvState they feed.
+	# EvPointer only needs the current modifier state, EvKeyboard objects
+	# add listeners for the events themselves, which get them after the
+	# state was updated. Either way each device is opened and tracked once.
+
+	shared = None
+	shared_lock = Lock()
+	shared_users = 0
+
+	def __init__(self):
+
+		Thread.__init__(self, name='EvKeyboardState monitor')
+		self.translate = XTranslate.get(layout_hook=True)
+		self.keyboards = self.detect_keyboards()
+		self.state = EvState(self.keyboards, self.translate)
+		self.listeners = ()
+		self.listeners_lock = Lock()
+		self.selector = DefaultSelector()
+		self.stop = False
+		self.loop = Reactor.get()
+		if self.loop:
+			self.reader = ReaderHandle(self.loop, self.keyboards, self.read)
+		else:
+			self.wakeup = Wakeup()
+
+	@classmethod
+	def get(cls):
+
+		with cls.shared_lock:
+			if cls.shared is None:
+				cls.shared = cls()
+				if cls.shared.loop:
+					cls.shared.reader.start()
+				else:
+					cls.shared.start()
+			cls.shared_users += 1
+			return cls.shared
+
+	@classmethod
+	def release(cls):
+
+		with cls.shared_lock:
+			if cls.shared_users > 0:
+				cls.shared_users -= 1
+				if not cls.shared_users:
+					cls.shared.close()
+					cls.shared = None
+
+	@staticmethod
+	def detect_keyboards():
+
+		keyboards = []
+		for device in list_devices():
+			input_device = InputDevice(device)
+			if is_keyboard(input_device):
+				keyboards.append(input_device)
+			else:
+				input_device.close()
+		return tuple(keyboards)
+
+	def add_listener(self, callback):
+
+		# Listeners are called with every key event on the reading thread
+		with self.listeners_lock:
+			if callback not in self.listeners:
+				self.listeners += (callback, )
+
+	def remove_listener(self, callback):
+
+		with self.listeners_lock:
+			self.listeners = tuple(
+				listener for listener in self.listeners
+				if listener != callback)
+
+	def run(self):
+
+		for keyboard in self.keyboards:
+			self.selector.register(keyboard, EVENT_READ)
+		self.selector.register(self.wakeup, EVENT_READ)
+		while not self.stop:
+			for key, mask in self.selector.select():
+				if key.fileobj is self.wakeup:
+					self.wakeup.clear()
+				else:
+					self.read(key.fileobj)
+		self.selector.close()
+		self.wakeup.close()
+		self.close_devices()
+
+	@traced('evdev read', 'hook')
+	def read(self, device):
+
+		for event in device.read():
+			if not self.state.update(device, event):
+				continue
+			for listener in self.listeners:
+				try:
+					listener(event)
+				except Exception as e:
+					print('Error in EvKeyboardState listener: \n',
+						''.join(traceback.format_exception(
+							type(e), e, e.__traceback__)))
+
+	def close_devices(self):
+
+		for keyboard in self.keyboards:
+			keyboard.close()
+
+	def close(self):
+
+		self.stop = True
+		self.listeners = ()
+		if self.loop:
+			self.reader.cancel(self.close_devices)
+			Reactor.release()
+		else:
+			self.wakeup.set()
+		XTranslate.release()
+
+	@property
+	def modifiers(self):
+
+		return self.translate.state_mods[self.state.modmask & 0xff]
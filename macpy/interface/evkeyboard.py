@@ -2,16 +2,24 @@
 
 from __future__ import print_function
 import traceback
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
 from threading import Thread
 try:
 	from queue import Queue
 except ImportError:
 	from Queue import Queue
-from selectors import DefaultSelector, EVENT_READ
-from collections import deque
-from evdev import ecodes, InputDevice, list_devices, categorize, UInput
-from evdev.events import KeyEvent
-from .xhelper import XTranslate
+from evdev import ecodes, UInput
+from .evhelper import EvKeyboardState, source_time
+from .reactor import Reactor
+from ..types.hotstrings import HotStrings
+from ..types.stream import EventStream
+from ..types.hookqueue import HookQueue, QueuePolicy
+from ..types.meter import Meter
+from ..types.trace import Tracer, call
+from ..types.tuples import QueueStats
 from ..key import Key, KeyState, Modifiers
 from ..constant.xmap import PRINT
 from ..event import KeyboardEvent, HotKey, HotString
@@ -21,32 +29,30 @@ class EvKeyboard(object):
 
 	def __init__(self):
 
-		self.translate = XTranslate()
-		self.translate.install_layout_hook()
-		self.keyboards = self.detect_keyboards()
+		# The devices are read and tracked by the shared monitor, which
+		# passes the events on to self._handle while hooks are installed
+		self.shared = EvKeyboardState.get()
+		self.translate = self.shared.translate
+		self.keyboards = self.shared.keyboards
+		self.state = self.shared.state
 		# ~ self.device = UInput.from_device(*self.keyboards, name='macpy keyboard')
 		self.device = UInput(name='macpy keyboard')
-		self.queue = Queue()
-		self.mainloop = Thread(target=self._mainloop, name='EvKeyboard mainloop')
-		self.mainloop.start()
-		self.selector = DefaultSelector()
-		self.events = Thread(target=self._events, name='EvKeyboard event loop')
-		self.stop = False
+		self.loop = Reactor.get()
+		if self.loop:
+			self.queue = None
+			self.mainloop = None
+		else:
+			self.queue = Queue()
+			self.mainloop = Thread(
+				target=self._mainloop, name='EvKeyboard mainloop')
+			self.mainloop.start()
 		self.hook = False
+		self.hook_queue = None
+		self.meter = None
 		self.hook_callback = None
 		self.hotkeys = False
 		self.hk_callbacks = {}
-		self.input = deque(maxlen=128)
-		self.hotstrings = {}
-
-	def detect_keyboards(self):
-
-		keyboards = []
-		for device in list_devices():
-			input_device = InputDevice(device)
-			if ecodes.EV_KEY in input_device.capabilities():
-				keyboards.append(input_device)
-		return tuple(keyboards)
+		self.hotstrings = HotStrings()
 
 	def _mainloop(self):
 
@@ -54,130 +60,139 @@ class EvKeyboard(object):
 			method, args = self.queue.get()
 			if method is None:
 				break
-			try:
-				method(*args)
-			except Exception as e:
-				print('Error in EvKeyboard mainloop: \n',
-					''.join(traceback.format_exception(
-						type(e), e, e.__traceback__)))
+			self.dispatch(method, args)
 			self.queue.task_done()
 
+	def dispatch(self, method, args):
+
+		try:
+			call(method, args)
+		except Exception as e:
+			print('Error in EvKeyboard mainloop: \n',
+				''.join(traceback.format_exception(
+					type(e), e, e.__traceback__)))
+
 	def enqueue(self, method, *args):
 
-		self.queue.put_nowait((method, args))
+		tracer = Tracer.active
+		if tracer is not None and method is not None:
+			method = tracer.queued(method)
+		if self.loop:
+			self.loop.call_soon_threadsafe(self.dispatch, method, args)
+		else:
+			self.queue.put_nowait((method, args))
+
+	def enqueue_callback(self, callback, event):
+
+		if self.meter is not None:
+			self.enqueue(self.meter.dispatch, callback, event)
+		else:
+			self.enqueue(callback, event)
 
 	def close(self):
 
 		self.device.close()
-		self.enqueue(None)
-		self.translate.close()
-		self.stop = True
+		self.shared.remove_listener(self._handle)
+		EvKeyboardState.release()
+		if self.loop:
+			Reactor.release()
+		else:
+			self.enqueue(None)
 
 	def get_key_state(self, key):
 
-		keycodes = [keycode for keyboard in self.keyboards
-			for keycode in keyboard.active_keys()]
-		if key.ec.value in keycodes:
-			return KeyState(True)
-		else:
-			return KeyState(False)
-
-	def _events(self):
-
-		for keyboard in self.keyboards:
-			self.selector.register(keyboard, EVENT_READ)
-		while not self.stop:
-			for key, mask in self.selector.select(timeout=0.3):
-				device = key.fileobj
-				for event in device.read():
-					event = categorize(event)
-					if isinstance(event, KeyEvent):
-						if event.keystate < 2:
-							key = Key.from_ec(event.event.code)
-							keystate = (KeyState.PRESSED if event.keystate == 1
-								else KeyState.RELEASED)
-							mask = 0
-							leds = [led for keyboard in self.keyboards
-								for led in keyboard.leds()]
-							if ecodes.LED_NUML in leds:
-								mask |= self.translate.lockmask['NUMLOCK']
-							if ecodes.LED_CAPSL in leds:
-								mask |= self.translate.lockmask['CAPSLOCK']
-							if ecodes.LED_SCROLLL in leds:
-								mask |= self.translate.lockmask['SCROLLLOCK']
-							keycodes = [keycode for keyboard in self.keyboards
-								for keycode in keyboard.active_keys()]
-							for keycode in keycodes:
-								for mod, codes in self.translate.modmap.items():
-									if ((keycode + self.translate.min_keycode)
-											in codes):
-										mask |= self.translate.modmask[mod]
-							if self.translate.modmap['ALTGR'][0] in keycodes:
-								mask |= self.translate.modmask['ALTGR']
-							keysym, mods, locks = self.translate. \
-								keycode_to_keysym(
-									key.ec + self.translate.min_keycode, mask)
-							char = None
-							if keysym in PRINT:
-								char = PRINT[keysym]
-							if self.hook:
-								self.enqueue(self.hook_callback, KeyboardEvent(
-									key, keystate, char, mods, locks))
-							if self.hotkeys and event.keystate == 1:
-								modifiers = set()
-								for mod, state in mods.items():
-									if state:
-										modifiers.add(
-											getattr(Modifiers, mod)[0])
-								hotkey = HotKey(key, modifiers)
-								if hotkey in self.hk_callbacks:
-									self.enqueue(
-										self.hk_callbacks[hotkey], hotkey)
-							if self.hotstrings and event.keystate == 0 and char:
-								self.input.append(char)
-								string = ''.join(self.input)
-								for hotstring in self.hotstrings:
-									if (string.endswith(hotstring.string)
-											and not hotstring.triggers):
-										retstring = HotString(
-											hotstring.string,
-											hotstring.triggers)
-										self.enqueue(
-											self.hotstrings[hotstring],
-											retstring)
-										self.input.clear()
-									elif (string[:-1].endswith(hotstring.string)
-											and string[-1] in hotstring.triggers):
-										retstring = HotString(
-											hotstring.string,
-											hotstring.triggers,
-											string[-1])
-										self.enqueue(
-											self.hotstrings[hotstring],
-											retstring)
-										self.input.clear()
-
-	def install_keyboard_hook(self, callback, grab=False):
-
-		if not self.events.is_alive():
-			self.events.start()
-		self.hook = True
+		return KeyState(self.state.is_pressed(key.ec.value))
+
+	def _handle(self, event):
+
+		# Called by the shared monitor after it updated the state
+		if event.type == ecodes.EV_KEY:
+			if event.value < 2:
+				key = Key.from_ec(event.code)
+				keystate = (KeyState.PRESSED if event.value == 1
+					else KeyState.RELEASED)
+				tracer = Tracer.active
+				if tracer is not None:
+					start = monotonic()
+				keysym, mods, locks = self.translate.keycode_to_keysym(
+					key.ec + self.translate.min_keycode, self.state.mask)
+				if tracer is not None:
+					tracer.span(
+						'translate', 'translate', start, monotonic())
+				char = None
+				if keysym in PRINT:
+					char = PRINT[keysym]
+				if self.hook:
+					kb_event = KeyboardEvent(
+						key, keystate, char, mods, locks)
+					kb_event.source_time = source_time(event)
+					self.hook_queue.push(kb_event)
+				if self.hotkeys and event.value == 1:
+					modifiers = set()
+					for mod, state in zip(mods._fields, mods):
+						if state:
+							modifiers.add(getattr(Modifiers, mod)[0])
+					hotkey = HotKey(key, modifiers)
+					if hotkey in self.hk_callbacks:
+						self.enqueue_callback(self.hk_callbacks[hotkey], hotkey)
+				if self.hotstrings and event.value == 0 and char:
+					for hotstring in self.hotstrings.feed(char):
+						self.enqueue_callback(self.hotstrings[hotstring], hotstring)
+
+	def install_keyboard_hook(
+			self, callback, grab=False, maxsize=0,
+			policy=QueuePolicy.BLOCK, executor=None):
+
 		self.hook_callback = callback
+		self.hook_queue = HookQueue(
+			callback, self.dispatch, self.enqueue, maxsize, policy,
+			executor=executor, meter=self.meter)
+		self.hook = True
+		self.shared.add_listener(self._handle)
 
 	def uninstall_keyboard_hook(self):
 
 		self.hook = False
+		if self.hook_queue:
+			self.hook_queue.close()
+		if not self.hotkeys:
+			self.shared.remove_listener(self._handle)
+
+	def events(self, loop, grab=False):
+
+		stream = EventStream(loop, self.uninstall_keyboard_hook)
+		self.install_keyboard_hook(stream.push_threadsafe, grab)
+		return stream
+
+	def queue_stats(self):
+
+		if self.hook_queue:
+			return self.hook_queue.stats()
+		return QueueStats(0, 0, 0, 0)
+
+	def enable_stats(self, enable=True):
+
+		self.meter = Meter() if enable else None
+		if self.hook_queue:
+			self.hook_queue.meter = self.meter
+
+	def stats(self):
+
+		if self.meter is not None:
+			return self.meter.snapshot()
+		return None
 
 	def init_hotkeys(self):
 
-		if not self.events.is_alive():
-			self.events.start()
+		self.shared.add_listener(self._handle)
 		self.hotkeys = True
 
 	def uninit_hotkeys(self):
 
 		self.hotkeys = False
 		self.hk_callbacks = {}
+		if not self.hook:
+			self.shared.remove_listener(self._handle)
 
 	def register_hotkey(self, key, modifiers, callback):
 
@@ -7,14 +7,24 @@ except ImportError:
 	from Queue import Queue
 from threading import Thread, enumerate as thread_enum
 import traceback
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
 from Xlib import display, X
 from evdev import InputDevice, list_devices, ecodes, UInput
 from libinput import LibInput, ContextType, EventType, ButtonState
 from libinput import PointerAxis as LIPAxis, PointerAxisSource
-from ..key import Key, KeyState, Modifiers as Mods
+from .evhelper import EvKeyboardState
+from .reactor import Reactor
+from ..key import Key, KeyState
 from ..event import PointerAxis as mPAxis
 from ..event import PointerEventMotion, PointerEventButton, PointerEventAxis
-from ..types.tuples import MousePos
+from ..types.tuples import MousePos, QueueStats
+from ..types.stream import EventStream
+from ..types.hookqueue import HookQueue, QueuePolicy
+from ..types.meter import Meter
+from ..types.trace import Tracer, call
 
 
 class EvPointer(object):
@@ -32,21 +42,26 @@ class EvPointer(object):
 
 		devices = [InputDevice(fn) for fn in list_devices()]
 		self.pointer_devs = []
-		self.keyboard_devs = []
 		for device in devices:
 			caps = device.capabilities()
 			if ecodes.EV_REL in caps:
 				self.pointer_devs.append(device)
 			elif ecodes.EV_ABS in caps:
 				self.pointer_devs.append(device)
-			elif ecodes.EV_KEY in caps:
-				self.keyboard_devs.append(device)
+		self.keyboard = EvKeyboardState.get()
 
-		self.queue = Queue()
-		self.mainloop = Thread(target=self._mainloop, name='EvPointer mainloop')
-		self.mainloop.start()
+		self.loop = Reactor.get()
+		if self.loop:
+			self.queue = None
+			self.mainloop = None
+		else:
+			self.queue = Queue()
+			self.mainloop = Thread(
+				target=self._mainloop, name='EvPointer mainloop')
+			self.mainloop.start()
 		self.stop = False
-		self.hook_callback = None
+		self.hook_queue = None
+		self.meter = None
 		self.hook = Thread(target=self._hook, name='EvPointer hook loop')
 		self.hook.start()
 
@@ -61,7 +76,11 @@ class EvPointer(object):
 	def close(self):
 
 		self.uinput.close()
-		self.enqueue(None)
+		EvKeyboardState.release()
+		if self.loop:
+			Reactor.release()
+		else:
+			self.enqueue(None)
 		if self.hook and self.hook.is_alive():
 			self.stop = True
 
@@ -74,74 +93,107 @@ class EvPointer(object):
 		for event in li.events:
 			if self.stop:
 				break
+			tracer = Tracer.active
+			if tracer is not None:
+				start = monotonic()
+			# A bad event must not end the hook thread
+			try:
+				self._process_event(event)
+			except Exception as e:
+				print('Error in EvPointer hook: \n',
+					''.join(traceback.format_exception(
+						type(e), e, e.__traceback__)))
+			if tracer is not None:
+				tracer.span('libinput event', 'hook', start, monotonic())
+
+	def _process_event(self, event):
+
+		mods = self.keyboard.modifiers
+		hook_queue = self.hook_queue
+		pointer_event = None
+
+		if event.type == EventType.POINTER_MOTION:
+			dx, dy = event.delta
+			x = self.position.x + round(dx)
+			y = self.position.y + round(dy)
+			if x < 0:
+				x = 0
+			elif x > (self.screen_width - 1):
+				x = self.screen_width - 1
+			if y < 0:
+				y = 0
+			elif y > (self.screen_height - 1):
+				y = self.screen_height - 1
+			self.position = MousePos(x, y)
+			pointer_event = PointerEventMotion(
+				self.position.x, self.position.y, mods)
+		elif event.type == EventType.POINTER_MOTION_ABSOLUTE:
+			x, y = event.transform_absolute_coords(
+				self.screen_width, self.screen_height)
+			self.position = MousePos(round(x), round(y))
+			pointer_event = PointerEventMotion(
+				self.position.x, self.position.y, mods)
+		elif event.type == EventType.POINTER_BUTTON:
+			button = Key.from_ec(event.button)
+			state = KeyState(event.button_state.value)
+			pointer_event = PointerEventButton(
+				self.position.x, self.position.y, button, state, mods)
+		elif event.type == EventType.POINTER_AXIS:
+			if event.has_axis(LIPAxis.SCROLL_VERTICAL):
+				axis = mPAxis.VERTICAL
+				value = event.get_axis_value(LIPAxis.SCROLL_VERTICAL)
+			else:
+				axis = mPAxis.HORIZONTAL
+				value = event.get_axis_value(LIPAxis.SCROLL_HORIZONTAL)
+			pointer_event = PointerEventAxis(
+				self.position.x, self.position.y, value, axis, mods)
+
+		if pointer_event and hook_queue:
+			# libinput stamps events with CLOCK_MONOTONIC, the event is
+			# still passed on without a source time if that fails
+			try:
+				pointer_event.source_time = event.get_time_usec() / 1000000
+			except Exception:
+				pass
+			hook_queue.push(pointer_event)
+
+	def install_pointer_hook(
+			self, callback, grab=False, maxsize=0, policy=QueuePolicy.BLOCK,
+			executor=None):
 
-			mods = {
-				'SHIFT': False,
-				'ALTGR': False,
-				'CTRL': False,
-				'ALT': False,
-				'META': False}
-			active_mods = set()
-			for device in self.keyboard_devs:
-				active_mods |= set(device.active_keys())
-			for key in active_mods:
-				key = Key.from_ec(key)
-				if key in Mods.SHIFT:
-					mods['SHIFT'] = True
-				elif key in Mods.CTRL:
-					mods['CTRL'] = True
-				elif key in Mods.ALT:
-					mods['ALT'] = True
-				elif key in Mods.META:
-					mods['META'] = True
-
-			if event.type == EventType.POINTER_MOTION:
-				dx, dy = event.delta
-				x = self.position.x + round(dx)
-				y = self.position.y + round(dy)
-				if x < 0:
-					x = 0
-				elif x > (self.screen_width - 1):
-					x = self.screen_width - 1
-				if y < 0:
-					y = 0
-				elif y > (self.screen_height - 1):
-					y = self.screen_height - 1
-				self.position = MousePos(x, y)
-				if self.hook_callback:
-					self.enqueue(self.hook_callback, PointerEventMotion(
-						self.position.x, self.position.y, mods))
-			elif event.type == EventType.POINTER_MOTION_ABSOLUTE:
-				x, y = event.transform_absolute_coords(
-					self.screen_width, self.screen_height)
-				self.position = MousePos(round(x), round(y))
-				if self.hook_callback:
-					self.enqueue(self.hook_callback, PointerEventMotion(
-						self.position.x, self.position.y, mods))
-			elif event.type == EventType.POINTER_BUTTON:
-				button = Key.from_ec(event.button)
-				state = KeyState(event.button_state.value)
-				if self.hook_callback:
-					self.enqueue(self.hook_callback, PointerEventButton(
-						self.position.x, self.position.y, button, state, mods))
-			elif event.type == EventType.POINTER_AXIS:
-				if event.has_axis(LIPAxis.SCROLL_VERTICAL):
-					axis = mPAxis.VERTICAL
-					value = event.get_axis_value(LIPAxis.SCROLL_VERTICAL)
-				else:
-					axis = mPAxis.HORIZONTAL
-					value = event.get_axis_value(LIPAxis.SCROLL_HORIZONTAL)
-				if self.hook_callback:
-					self.enqueue(self.hook_callback, PointerEventAxis(
-						self.position.x, self.position.y, value, axis, mods))
-
-	def install_pointer_hook(self, callback, grab=False):
-
-		self.hook_callback = callback
+		self.hook_queue = HookQueue(
+			callback, self.dispatch, self.enqueue, maxsize, policy,
+			executor=executor, meter=self.meter)
 
 	def uninstall_pointer_hook(self):
 
-		self.hook_callback = None
+		if self.hook_queue:
+			self.hook_queue.close()
+
+	def queue_stats(self):
+
+		if self.hook_queue:
+			return self.hook_queue.stats()
+		return QueueStats(0, 0, 0, 0)
+
+	def enable_stats(self, enable=True):
+
+		self.meter = Meter() if enable else None
+		if self.hook_queue:
+			self.hook_queue.meter = self.meter
+
+	def stats(self):
+
+		if self.meter is not None:
+			return self.meter.snapshot()
+		return None
+
+	def events(self, loop, grab=False):
+
+		# libinput is read on the hook thread, so events hop over to loop
+		stream = EventStream(loop, self.uninstall_pointer_hook)
+		self.install_pointer_hook(stream.push_threadsafe, grab)
+		return stream
 
 	def _mainloop(self):
 
@@ -149,18 +201,28 @@ class EvPointer(object):
 			method, args = self.queue.get()
 			if method is None:
 				break
-			try:
-				method(*args)
-			except Exception as e:
-				print(
-					'Error in EvPointer mainloop: \n',
-					''.join(traceback.format_exception(
-						type(e), e, e.__traceback__)))
+			self.dispatch(method, args)
 			self.queue.task_done()
 
+	def dispatch(self, method, args):
+
+		try:
+			call(method, args)
+		except Exception as e:
+			print(
+				'Error in EvPointer mainloop: \n',
+				''.join(traceback.format_exception(
+					type(e), e, e.__traceback__)))
+
 	def enqueue(self, method, *args):
 
-		self.queue.put_nowait((method, args))
+		tracer = Tracer.active
+		if tracer is not None and method is not None:
+			method = tracer.queued(method)
+		if self.loop:
+			self.loop.call_soon_threadsafe(self.dispatch, method, args)
+		else:
+			self.queue.put_nowait((method, args))
 
 	def _warp(self, x, y, relative=False):
 
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+from __future__ import print_function
+import traceback
+from heapq import heappush, heappop
+from threading import Thread, Lock, Event, current_thread
+from collections import deque
+from selectors import DefaultSelector, EVENT_READ
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
+from ..types.wakeup import Wakeup
+from ..types.trace import call
+
+
+class Reactor(object):
+	# Optional single thread that owns every macpy file descriptor and runs
+	# their handlers, timers and queued calls in turn. Method names follow
+	# asyncio's event loop so interfaces can be driven by either one.
+
+	enabled = False
+	shared = None
+	shared_lock = Lock()
+	shared_users = 0
+
+	def __init__(self):
+
+		self.selector = DefaultSelector()
+		self.wakeup = Wakeup()
+		self.selector.register(self.wakeup, EVENT_READ, (self.wakeup.clear, ()))
+		self.lock = Lock()
+		self.ready = deque()
+		self.timers = []
+		self.sequence = 0
+		self.thread = Thread(target=self._run, name='macpy reactor')
+		self.thread.start()
+
+	@classmethod
+	def get(cls):
+
+		# Returns None unless the reactor was enabled, interfaces fall back
+		# to their own threads then. Every other call must be paired with
+		# release().
+		with cls.shared_lock:
+			if not cls.enabled:
+				return None
+			if cls.shared is None:
+				cls.shared = cls()
+			cls.shared_users += 1
+			return cls.shared
+
+	@classmethod
+	def release(cls):
+
+		with cls.shared_lock:
+			if cls.shared_users > 0:
+				cls.shared_users -= 1
+				if not cls.shared_users:
+					cls.shared.close()
+					cls.shared = None
+
+	def in_thread(self):
+
+		return current_thread() is self.thread
+
+	def call_soon_threadsafe(self, callback, *args):
+
+		with self.lock:
+			self.ready.append((callback, args))
+		self.wakeup.set()
+
+	def call_later(self, delay, callback, *args):
+
+		with self.lock:
+			self.sequence += 1
+			heappush(self.timers,
+				(monotonic() + delay, self.sequence, callback, args))
+		self.wakeup.set()
+
+	def add_reader(self, fileobj, callback, *args):
+
+		if self.in_thread():
+			self.selector.register(fileobj, EVENT_READ, (callback, args))
+		else:
+			self.call_soon_threadsafe(
+				self.add_reader, fileobj, callback, *args)
+
+	def remove_reader(self, fileobj):
+
+		if self.in_thread():
+			try:
+				self.selector.unregister(fileobj)
+			except (KeyError, ValueError):
+				pass
+		else:
+			self.call_soon_threadsafe(self.remove_reader, fileobj)
+
+	def _call(self, callback, args):
+
+		try:
+			call(callback, args, 'reactor')
+		except Exception as e:
+			print('Error in macpy reactor: \n',
+				''.join(traceback.format_exception(
+					type(e), e, e.__traceback__)))
+
+	def _run(self):
+
+		while True:
+			with self.lock:
+				if self.ready:
+					timeout = 0
+				elif self.timers:
+					timeout = max(0, self.timers[0][0] - monotonic())
+				else:
+					timeout = None
+			for key, mask in self.selector.select(timeout):
+				callback, args = key.data
+				self._call(callback, args)
+			now = monotonic()
+			with self.lock:
+				while self.timers and self.timers[0][0] <= now:
+					when, sequence, callback, args = heappop(self.timers)
+					self.ready.append((callback, args))
+				ready = self.ready
+				self.ready = deque()
+			for callback, args in ready:
+				# Everything queued before close() still runs
+				if callback is None:
+					self.selector.close()
+					self.wakeup.close()
+					return
+				self._call(callback, args)
+
+	def close(self):
+
+		self.call_soon_threadsafe(None)
+		if not self.in_thread():
+			self.thread.join()
+
+
+class ReaderHandle(object):
+	# Stands in for a hook thread when a loop reads the file objects
+	# instead. Mirrors the parts of the Thread interface the interfaces
+	# use to track their hooks. callback gets the ready file object.
+
+	def __init__(self, loop, fileobjs, callback):
+
+		self.loop = loop
+		self.fileobjs = tuple(fileobjs)
+		self.callback = callback
+		self.lock = Lock()
+		self.thread = None
+		self.alive = False
+		self.done = Event()
+
+	def start(self):
+
+		self.alive = True
+		self.loop.call_soon_threadsafe(self._start)
+
+	def _start(self):
+
+		with self.lock:
+			if not self.alive:
+				return
+			self.thread = current_thread()
+			self.resume()
+
+	def is_alive(self):
+
+		return self.alive
+
+	def pause(self):
+
+		for fileobj in self.fileobjs:
+			self.loop.remove_reader(fileobj)
+
+	def resume(self):
+
+		for fileobj in self.fileobjs:
+			self.loop.add_reader(fileobj, self.callback, fileobj)
+
+	def cancel(self, cleanup=None, *args):
+
+		# Stops reading and then runs cleanup on the loop thread. Blocks
+		# until that is done unless called from the loop thread itself or
+		# before the loop got to start reading.
+		with self.lock:
+			self.alive = False
+			started = self.thread is not None
+			inline = not started or current_thread() is self.thread
+		if inline:
+			self._cancel(started, cleanup, args)
+		else:
+			self.loop.call_soon_threadsafe(self._cancel, True, cleanup, args)
+			self.done.wait()
+
+	def _cancel(self, started, cleanup, args):
+
+		try:
+			if started:
+				self.pause()
+			if cleanup is not None:
+				cleanup(*args)
+		finally:
+			self.done.set()
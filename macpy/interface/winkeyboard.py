@@ -7,7 +7,6 @@ try:
 	from queue import Queue, Empty
 except ImportError:
 	from Queue import Queue, Empty
-from collections import deque
 from ctypes import WINFUNCTYPE, windll, wintypes, byref, create_unicode_buffer
 from ctypes import POINTER, sizeof
 from ctypes import c_int, c_short, c_void_p, c_byte, c_uint, c_wchar, c_bool
@@ -15,7 +14,12 @@ from ..key import Key, KeyState, Modifiers
 from ..constant.windows import WH_KEYBOARD_LL, PM_REMOVE, LLKHF_INJECTED, KeyWM
 from ..constant.windows import MOD, WM_HOTKEY, KEYEVENTF, InputType
 from ..types.structures import KBDLLHOOKSTRUCT, INPUT, INPUTunion, KEYBDINPUT
-from ..types.tuples import KeyEvent
+from ..types.tuples import KeyEvent, QueueStats
+from ..types.hotstrings import HotStrings
+from ..types.stream import EventStream
+from ..types.hookqueue import HookQueue, QueuePolicy
+from ..types.meter import Meter
+from ..types.trace import Tracer, call
 from ..event import KeyboardEvent, HotKey, HotString
 
 
@@ -48,10 +52,11 @@ class WinKeyboard(object):
 			target=self._mainloop, name='WinKeyboard mainloop')
 		self.mainloop.start()
 		self.hook = None
+		self.hook_queue = None
+		self.meter = None
 		self.hk_queue = Queue()
 		self.hotkeys = None
-		self.input = deque(maxlen=128)
-		self.hotstrings = {}
+		self.hotstrings = HotStrings()
 
 	def _mainloop(self):
 
@@ -59,18 +64,32 @@ class WinKeyboard(object):
 			method, args = self.queue.get()
 			if method is None:
 				break
-			try:
-				method(*args)
-			except Exception as e:
-				print('Error in WinKeyboard mainloop: \n',
-					''.join(
-						traceback.format_exception(type(e), e, e.__traceback__)))
+			self.dispatch(method, args)
 			self.queue.task_done()
 
+	def dispatch(self, method, args):
+
+		try:
+			call(method, args)
+		except Exception as e:
+			print('Error in WinKeyboard mainloop: \n',
+				''.join(
+					traceback.format_exception(type(e), e, e.__traceback__)))
+
 	def enqueue(self, method, *args):
 
+		tracer = Tracer.active
+		if tracer is not None and method is not None:
+			method = tracer.queued(method)
 		self.queue.put_nowait((method, args))
 
+	def enqueue_callback(self, callback, event):
+
+		if self.meter is not None:
+			self.enqueue(self.meter.dispatch, callback, event)
+		else:
+			self.enqueue(callback, event)
+
 	def close(self):
 
 		self.enqueue(None)
@@ -84,10 +103,15 @@ class WinKeyboard(object):
 		output = windll.user32.GetAsyncKeyState(key.vk)
 		return KeyState(bool(output >> 8))
 
-	def install_keyboard_hook(self, callback, grab=False):
+	def install_keyboard_hook(
+			self, callback, grab=False, maxsize=0, policy=QueuePolicy.BLOCK,
+			executor=None):
 
 		self.hook_stop = False
 		self.hook_callback = callback
+		self.hook_queue = HookQueue(
+			self.process_event, self.dispatch, self.enqueue, maxsize, policy,
+			executor=executor, meter=self.meter, block=False)
 		self.hook_grab = grab
 		self.hook = Thread(target=self._hook, name='WinKeyboard hook loop')
 		self.hook.start()
@@ -95,6 +119,31 @@ class WinKeyboard(object):
 	def uninstall_keyboard_hook(self):
 
 		self.hook_stop = True
+		self.hook_queue.close()
+
+	def queue_stats(self):
+
+		if self.hook_queue:
+			return self.hook_queue.stats()
+		return QueueStats(0, 0, 0, 0)
+
+	def enable_stats(self, enable=True):
+
+		self.meter = Meter() if enable else None
+		if self.hook_queue:
+			self.hook_queue.meter = self.meter
+
+	def stats(self):
+
+		if self.meter is not None:
+			return self.meter.snapshot()
+		return None
+
+	def events(self, loop, grab=False):
+
+		stream = EventStream(loop, self.uninstall_keyboard_hook)
+		self.install_keyboard_hook(stream.push_threadsafe, grab)
+		return stream
 
 	def _hook(self):
 
@@ -103,7 +152,7 @@ class WinKeyboard(object):
 			kbdllhook = lParam.contents
 			event = KeyEvent(
 				wParam, kbdllhook.vkCode, kbdllhook.scanCode, kbdllhook.flags)
-			self.enqueue(self.process_event, event)
+			self.hook_queue.push(event)
 			if not self.hook_grab or event.flags & LLKHF_INJECTED:
 				return windll.user32.CallNextHookEx(hID, nCode, wParam, lParam)
 			else:
@@ -185,25 +234,14 @@ class WinKeyboard(object):
 		keystate = (KeyState.PRESSED
 			if KeyWM(event.message) in {KeyWM.WM_KEYDOWN, KeyWM.WM_SYSKEYDOWN}
 			else KeyState.RELEASED)
-		self.enqueue(self.hook_callback, KeyboardEvent(
-			Key.from_vk(event.vk), keystate, char, mods, locks))
+		# Already on the mainloop, a second trip through the queue would
+		# escape the hook queue's bound
+		self.dispatch(self.hook_callback, (KeyboardEvent(
+			Key.from_vk(event.vk), keystate, char, mods, locks), ))
 
 		if keystate == KeyState.PRESSED and self.hotstrings and char:
-			self.input.append(char)
-			string = ''.join(self.input)
-			for hotstring in self.hotstrings:
-				if (string.endswith(hotstring.string)
-						and not hotstring.triggers):
-					retstring = HotString(
-						hotstring.string, hotstring.triggers)
-					self.enqueue(self.hotstrings[hotstring], retstring)
-					self.input.clear()
-				elif (string[:-1].endswith(hotstring.string)
-						and string[-1] in hotstring.triggers):
-					retstring = HotString(
-						hotstring.string, hotstring.triggers, string[-1])
-					self.enqueue(self.hotstrings[hotstring], retstring)
-					self.input.clear()
+			for hotstring in self.hotstrings.feed(char):
+				self.enqueue_callback(self.hotstrings[hotstring], hotstring)
 
 	def init_hotkeys(self):
 
@@ -243,7 +281,7 @@ class WinKeyboard(object):
 							try:
 								hotkey = self.hk_ids[wm_msg.wParam]
 								ret = HotKey(hotkey.key, hotkey.modifiers)
-								self.enqueue(self.hk_callbacks[hotkey], ret)
+								self.enqueue_callback(self.hk_callbacks[hotkey], ret)
 							except KeyError:
 								pass
 				time.sleep(0.3)
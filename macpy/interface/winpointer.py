@@ -13,7 +13,11 @@ from ctypes import c_int, c_void_p, c_short, c_bool, c_uint
 from ..key import Key, KeyState
 from ..event import PointerAxis
 from ..event import PointerEventMotion, PointerEventButton, PointerEventAxis
-from ..types.tuples import MousePos, Modifiers, MouseEvent
+from ..types.tuples import MousePos, Modifiers, MouseEvent, QueueStats
+from ..types.stream import EventStream
+from ..types.hookqueue import HookQueue, QueuePolicy
+from ..types.meter import Meter
+from ..types.trace import Tracer, call
 from ..types.structures import MSLLHOOKSTRUCT, INPUT, INPUTunion, MOUSEINPUT, Point
 from ..constant.windows import WH_MOUSE_LL, PM_REMOVE, WHEEL_DELTA, MouseWM
 from ..constant.windows import InputType, MOUSEEVENTF, SM_CXSCREEN, SM_CYSCREEN
@@ -39,6 +43,8 @@ class WinPointer(object):
 		self.mainloop = Thread(target=self._mainloop, name='WinPointer mainloop')
 		self.mainloop.start()
 		self.hook = None
+		self.hook_queue = None
+		self.meter = None
 
 	def _mainloop(self):
 
@@ -46,23 +52,37 @@ class WinPointer(object):
 			method, args = self.queue.get()
 			if method is None:
 				break
-			try:
-				method(*args)
-			except Exception as e:
-				print(
-					'Error in WinPointer mainloop: \n',
-					''.join(traceback.format_exception(
-						type(e), e, e.__traceback__)))
+			self.dispatch(method, args)
 			self.queue.task_done()
 
+	def dispatch(self, method, args):
+
+		try:
+			call(method, args)
+		except Exception as e:
+			print(
+				'Error in WinPointer mainloop: \n',
+				''.join(traceback.format_exception(
+					type(e), e, e.__traceback__)))
+
 	def enqueue(self, method, *args):
 
+		tracer = Tracer.active
+		if tracer is not None and method is not None:
+			method = tracer.queued(method)
 		self.queue.put_nowait((method, args))
 
-	def install_pointer_hook(self, callback, grab=False):
+	def install_pointer_hook(
+			self, callback, grab=False, maxsize=0, policy=QueuePolicy.BLOCK,
+			executor=None):
 
 		self.stop = False
 		self.hook_callback = callback
+		# Raw hook events are queued, so only plain moves get coalesced
+		self.hook_queue = HookQueue(
+			self.process_event, self.dispatch, self.enqueue, maxsize, policy,
+			lambda event: event.message == MouseWM.WM_MOUSEMOVE.value,
+			executor=executor, meter=self.meter, block=False)
 		self.hook_grab = grab
 		self.hook = Thread(target=self._hook, name='WinPointer hook loop')
 		self.hook.start()
@@ -71,6 +91,31 @@ class WinPointer(object):
 
 		self.stop = True
 		self.hook = None
+		self.hook_queue.close()
+
+	def queue_stats(self):
+
+		if self.hook_queue:
+			return self.hook_queue.stats()
+		return QueueStats(0, 0, 0, 0)
+
+	def enable_stats(self, enable=True):
+
+		self.meter = Meter() if enable else None
+		if self.hook_queue:
+			self.hook_queue.meter = self.meter
+
+	def stats(self):
+
+		if self.meter is not None:
+			return self.meter.snapshot()
+		return None
+
+	def events(self, loop, grab=False):
+
+		stream = EventStream(loop, self.uninstall_pointer_hook)
+		self.install_pointer_hook(stream.push_threadsafe, grab)
+		return stream
 
 	def close(self):
 
@@ -85,7 +130,7 @@ class WinPointer(object):
 			msllhook = lParam.contents
 			event = MouseEvent(
 				wParam, msllhook.pt, msllhook.mouseData, msllhook.flags)
-			self.enqueue(self.process_event, event)
+			self.hook_queue.push(event)
 			if not self.hook_grab or event.flags & LLMHF_INJECTED:
 				return windll.user32.CallNextHookEx(hID, nCode, wParam, lParam)
 			else:
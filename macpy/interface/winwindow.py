@@ -13,7 +13,8 @@ from ..event import PointerEventMotion, PointerEventButton, PointerEventAxis
 from ..event import KeyboardEvent, PointerAxis
 from ..types.structures import Point, WINDOWPLACEMENT, RECT, INPUT, INPUTunion
 from ..types.structures import KEYBDINPUT
-from ..types.tuples import WinPos, WinSize
+from ..types.tuples import WinPos, WinSize, WinGeometry, WindowRecord
+from ..types.stream import EventStream
 from ..key import Key, KeyState, Modifiers
 
 
@@ -103,6 +104,16 @@ class WinWindow(with_metaclass(MetaWindow)):
 		if cls.hook and cls.hook.is_alive():
 			cls.stop = True
 
+	@classmethod
+	def events(cls, loop, callback=None):
+
+		stream = EventStream(loop, cls.uninstall_window_hook)
+		if callback is None:
+			callback = stream.push
+		cls.install_window_hook(
+			lambda event: loop.call_soon_threadsafe(callback, event))
+		return stream
+
 	@classmethod
 	def _hook(cls):
 
@@ -149,6 +160,54 @@ class WinWindow(with_metaclass(MetaWindow)):
 			return tuple(window_list)
 		return ()
 
+	@classmethod
+	def enable_cache(cls):
+
+		return None
+
+	@classmethod
+	def disable_cache(cls):
+
+		return None
+
+	@classmethod
+	def cache_stats(cls):
+
+		return None
+
+	@classmethod
+	def enable_stats(cls, enable=True):
+
+		raise NotImplementedError('Window hook statistics require X11')
+
+	@classmethod
+	def stats(cls):
+
+		return None
+
+	@classmethod
+	def snapshot(cls, fields):
+
+		records = []
+		for window in cls.list_windows():
+			values = {}
+			if 'title' in fields:
+				values['title'] = window.title
+			if 'wm_class' in fields:
+				values['wm_class'] = window.wm_class
+			if 'pid' in fields:
+				values['pid'] = window.pid
+			if 'geometry' in fields:
+				rect = RECT()
+				if windll.user32.GetWindowRect(window.hwnd, byref(rect)):
+					values['geometry'] = WinGeometry(
+						rect.left, rect.top,
+						rect.right - rect.left, rect.bottom - rect.top)
+			if 'state' in fields:
+				values['state'] = window.state
+			records.append(WindowRecord(window.hwnd, **values))
+		return tuple(records)
+
 	@classmethod
 	def get_active(cls):
 
@@ -177,13 +236,34 @@ class WinWindow(with_metaclass(MetaWindow)):
 			return cls(hwnd)
 		return None
 
+	@classmethod
+	def find_all(cls, wm_class=None, title=None, pid=None):
+
+		def match_title(window):
+
+			window_title = window.title
+			if window_title is None:
+				return False
+			if hasattr(title, 'search'):
+				return title.search(window_title) is not None
+			return title in window_title
+
+		return tuple(window for window in cls.list_windows()
+			if (wm_class is None or window.wm_class == wm_class)
+				and (pid is None or window.pid == pid)
+				and (title is None or match_title(window)))
+
 	@classmethod
 	def get_by_title(cls, title):
 
-		for window in cls.list_windows():
-			if title in window.title:
-				return window
-		return None
+		windows = cls.find_all(title=title)
+		return windows[0] if windows else None
+
+	@classmethod
+	def get_by_pid(cls, pid):
+
+		windows = cls.find_all(pid=pid)
+		return windows[0] if windows else None
 
 	@property
 	def state(self):
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from subprocess import check_output
-from threading import Thread, Condition
+from threading import Thread, Condition, Lock, RLock, Event
 try:
 	from queue import Queue
 except ImportError:
@@ -10,24 +10,101 @@ import re
 import os.path
 import sys
 import time
+import struct
 from ast import literal_eval
 from ctypes import CDLL, c_char_p
 from Xlib import display, X
+from Xlib.ext import record
 from Xlib.error import BadValue
 from ..platform import PLATFORM, Platform, ARCH, Arch
 from ..constant import XK
 from ..constant.xmap import PRINT, KEYPAD, NOIDX, NAME
+from ..types.tuples import MODIFIERS, LOCKS
+from .reactor import Reactor
+
+
+# type, detail, time, root_x, root_y and state of a core input event, the
+# only parts of the 32 byte wire format the hooks look at. RECORD hands
+# them over in our byte order unless client_swapped is set.
+RECORD_EVENT = struct.Struct('=BBxxI12xhh4xHxx')
+
+
+def record_events(data):
+
+	# Decodes the device events in a RECORD reply without building
+	# an Xlib event object for each of them. The send_event bit is left in
+	# the type. A trailing partial event is ignored.
+	view = memoryview(data)
+	return RECORD_EVENT.iter_unpack(view[:len(view) - len(view) % 32])
+
+
+def server_time(ms):
+
+	# X servers stamp input with a 32 bit millisecond clock, on Linux that
+	# is CLOCK_MONOTONIC like time.monotonic(). Maps a stamp to the latest
+	# monotonic time it may stand for.
+	now = time.monotonic()
+	return now - ((int(now * 1000) - ms) & 0xffffffff) / 1000
+
+
+def enable_context_deferred(disp, context, callback):
+
+	# Starts a RECORD context without blocking until it ends. Its data is
+	# passed to callback whenever disp reads from its socket, so a loop
+	# waiting on disp can drive it.
+	record.EnableContext(
+		callback=callback,
+		display=disp.display,
+		opcode=disp.display.get_extension_major(record.extname),
+		context=context,
+		defer=True)
+	disp.flush()
 
 
 class XTranslate(object):
 
+	shared = None
+	shared_lock = Lock()
+	shared_users = 0
+
 	def __init__(self):
 
+		self.lock = RLock()
+		self.generation = 0
 		self.display = display.Display()
 		self.map_keys()
 		self.map_mods()
+		self.map_table()
 		self.reprint = {char: sym for sym, char in PRINT.items()}
 		self.layout = None
+		self.layout_stop = None
+
+	@classmethod
+	def get(cls, layout_hook=False):
+
+		# One translator and X connection is shared by every interface
+		# object in the process. Users that need it to follow layout changes
+		# pass layout_hook=True and must call release() when done. Others
+		# only see layout changes while such a user exists, XWindow only
+		# needs the modifier masks to send keys to a window.
+		with cls.shared_lock:
+			if cls.shared is None:
+				cls.shared = cls()
+			if layout_hook:
+				if not cls.shared.layout:
+					cls.shared.install_layout_hook()
+				cls.shared_users += 1
+			return cls.shared
+
+	@classmethod
+	def release(cls):
+
+		with cls.shared_lock:
+			if cls.shared_users > 0:
+				cls.shared_users -= 1
+				if not cls.shared_users:
+					cls.shared.close()
+					cls.shared = None
 
 	def map_keys(self):
 
@@ -45,11 +122,12 @@ class XTranslate(object):
 
 	def list_keysyms(self, keycode):
 
-		keycode -= self.min_keycode
-		try:
-			return self.keymap[keycode]
-		except IndexError:
-			return (0, )
+		with self.lock:
+			keycode -= self.min_keycode
+			try:
+				return self.keymap[keycode]
+			except IndexError:
+				return (0, )
 
 	def map_mods(self):
 
@@ -120,50 +198,63 @@ class XTranslate(object):
 		self.lockmap = lockmap
 		self.lockmask = lockmask
 
+	def map_table(self):
+
+		# Translation of every keycode under every combination of the eight
+		# core modifier bits is precomputed, so translating an event is
+		# a single list lookup. Columns 2-4 of each state entry hold the
+		# keysym index for keypad, alphabetic and other printable keys.
+		states = []
+		for state in range(256):
+			mods = MODIFIERS[
+				bool(state & self.modmask['SHIFT'])
+				| bool(state & self.modmask['ALTGR']) << 1
+				| bool(state & self.modmask['CTRL']) << 2
+				| bool(state & self.modmask['ALT']) << 3
+				| bool(state & self.modmask['META']) << 4]
+			locks = LOCKS[
+				bool(state & self.lockmask['NUMLOCK'])
+				| bool(state & self.lockmask['CAPSLOCK']) << 1
+				| bool(state & self.lockmask['SCROLLLOCK']) << 2]
+			level = 4 if mods.ALTGR else 0
+			states.append((
+				mods,
+				locks,
+				int((mods.SHIFT ^ locks.CAPSLOCK) ^ locks.NUMLOCK),
+				int(mods.SHIFT ^ locks.CAPSLOCK) + level,
+				int(mods.SHIFT) + level))
+		self.state_mods = tuple(entry[0] for entry in states)
+		table = []
+		for keycode in range(256):
+			if self.min_keycode <= keycode <= self.max_keycode:
+				keysym = self.list_keysyms(keycode)[0]
+			else:
+				keysym = X.NoSymbol
+			if keysym in KEYPAD:
+				column = 2
+			elif keysym in PRINT:
+				column = 3 if PRINT[keysym].isalpha() else 4
+			elif keysym not in NOIDX:
+				column = 4
+			else:
+				column = None
+			keysyms = []
+			for index in range(6):
+				keysym = self.display.keycode_to_keysym(keycode, index)
+				if keysym == XK.XK_Return:
+					keysym = XK.XK_Linefeed
+				keysyms.append(keysym)
+			if column is None:
+				table.extend((keysyms[0], entry[0], entry[1])
+					for entry in states)
+			else:
+				table.extend((keysyms[entry[column]], entry[0], entry[1])
+					for entry in states)
+		self.table = table
+
 	def keycode_to_keysym(self, keycode, state):
 
-		index, mods, locks = self.translate_state(state, keycode)
-		keysym = self.display.keycode_to_keysym(keycode, index)
-		if keysym == XK.XK_Return:
-			keysym = XK.XK_Linefeed
-		return keysym, mods, locks
-
-	def translate_state(self, state, keycode):
-
-		index = 0
-		mods = {mod: False for mod in self.modmask}
-		locks = {lock: False for lock in self.lockmask}
-		mods['SHIFT'] = bool(state & self.modmask['SHIFT'])
-		mods['ALTGR'] = bool(state & self.modmask['ALTGR'])
-		mods['CTRL'] = bool(state & self.modmask['CTRL'])
-		mods['ALT'] = bool(state & self.modmask['ALT'])
-		mods['META'] = bool(state & self.modmask['META'])
-		locks['NUMLOCK'] = bool(state & self.lockmask['NUMLOCK'])
-		locks['CAPSLOCK'] = bool(state & self.lockmask['CAPSLOCK'])
-		locks['SCROLLLOCK'] = bool(state & self.lockmask['SCROLLLOCK'])
-		keysym = self.list_keysyms(keycode)[0]
-		if keysym in KEYPAD:
-			if (mods['SHIFT'] ^ locks['CAPSLOCK']) ^ locks['NUMLOCK']:
-				index += 1
-		elif keysym in PRINT:
-			if PRINT[keysym].isalpha():
-				if mods['SHIFT'] ^ locks['CAPSLOCK']:
-					index +=1
-				if mods['ALTGR']:
-					index += 4
-			else:
-				if mods['SHIFT']:
-					index += 1
-				if mods['ALTGR']:
-					index += 4
-		elif keysym not in NOIDX:
-			if mods['SHIFT']:
-				index += 1
-			if mods['ALTGR']:
-				index += 4
-		else:
-			index = 0
-		return index, mods, locks
+		return self.table[(keycode << 8) | (state & 0xff)]
 
 	def lookup_keysym(self, char):
 
@@ -174,13 +265,16 @@ class XTranslate(object):
 
 	def keysym_to_keycode(self, keysym):
 
-		keycode = self.display.keysym_to_keycode(keysym)
-		mods = {mod: False for mod in self.modmask}
-		locks = {lock: False for lock in self.lockmask}
-		try:
-			index = self.keymap[keycode - self.min_keycode].index(keysym)
-		except ValueError:
-			index = 0
+		# Called from user threads, reload_display() may swap the display
+		# and keymap meanwhile
+		with self.lock:
+			keycode = self.display.keysym_to_keycode(keysym)
+			mods = {mod: False for mod in self.modmask}
+			locks = {lock: False for lock in self.lockmask}
+			try:
+				index = self.keymap[keycode - self.min_keycode].index(keysym)
+			except ValueError:
+				index = 0
 		if index != 0 and index != 2:
 			if index == 1:
 				mods['SHIFT'] = True
@@ -195,12 +289,30 @@ class XTranslate(object):
 
 	def install_layout_hook(self):
 
+		if Reactor.enabled:
+			# Polling and reloading shell out to setxkbmap, which would hold
+			# up every reader of the reactor thread, so with the reactor
+			# a single worker does both instead of the two threads below
+			self.layout = XLayout(self.reload_display)
+			self.layout_stop = Event()
+			self.reloader = Thread(
+				target=self._poll_layout, name='XTranslate layout poll')
+			self.reloader.start()
+			return
 		self.layout_queue = Queue()
 		self.layout = XLayout(self.layout_callback)
 		self.layout.start()
 		self.reloader = Thread(target=self._reloader, name='XTranslate reloader')
 		self.reloader.start()
 
+	def _poll_layout(self):
+
+		monitor = self.layout
+		while not self.layout_stop.wait(0.3):
+			layout = monitor.poll()
+			if layout:
+				self.reload_display(layout)
+
 	def layout_callback(self, layout):
 
 		self.layout_queue.put_nowait(layout)
@@ -215,20 +327,34 @@ class XTranslate(object):
 
 	def reload_display(self, layout):
 
-		self.display.close()
-		self.layout.set_x_layout(layout)
-		self.display = display.Display()
-		self.map_keys()
-		self.map_mods()
-		self.layout.restore_layouts(layout)
-		with self.layout.monitor:
-			self.layout.monitor.notify()
+		monitor = self.layout
+		if monitor is None:
+			return
+		with self.lock:
+			old_display = self.display
+			monitor.set_x_layout(layout)
+			self.display = display.Display()
+			self.map_keys()
+			self.map_mods()
+			self.map_table()
+			self.generation += 1
+			old_display.close()
+			monitor.restore_layouts(layout)
+		with monitor.monitor:
+			monitor.monitor.notify()
 
 	def close(self):
 
 		if self.layout:
-			self.layout.close()
-			self.layout_callback(None)
+			layout = self.layout
+			self.layout = None
+			layout.close()
+			with layout.monitor:
+				layout.monitor.notify()
+			if self.layout_stop is not None:
+				self.layout_stop.set()
+			else:
+				self.layout_callback(None)
 
 
 class XLayout(Thread):
@@ -254,6 +380,7 @@ class XLayout(Thread):
 				'gsettings', 'get', 'org.gnome.desktop.input-sources']
 			self.layout = self.gsettings_get_layout()
 		self.layouts = self.get_config_layouts()
+		self.prev_layout = None
 		self.stop = False
 		self.monitor = Condition()
 
@@ -299,29 +426,34 @@ class XLayout(Thread):
 
 	def run(self):
 
-		prev_layout = None
 		while not self.stop:
-			if PLATFORM == Platform.X11:
-				output = self.xkbswitch.Xkb_Switch_getXkbLayout()
-				match = self.parse_xkbswitch.match(output.decode())
-				group = match.group
-				variant = group('variant') if group('variant') else ''
-				self.layout = (group('group'), variant)
-			else:
-				self.layout = self.gsettings_get_layout()
-			with self.monitor:
-				if prev_layout:
-					if self.layout != prev_layout:
-						self.callback(self.layout)
-						prev_layout = self.layout
-						self.monitor.wait()
-				else:
-					prev_layout = self.layout
-					if self.layout != self.layouts[0]:
-						self.callback(self.layout)
-						self.monitor.wait()
+			layout = self.poll()
+			if layout:
+				with self.monitor:
+					self.callback(layout)
+					self.monitor.wait()
 			time.sleep(0.3)
 
+	def poll(self):
+
+		# Returns the new layout if it changed since the last poll
+		if PLATFORM == Platform.X11:
+			output = self.xkbswitch.Xkb_Switch_getXkbLayout()
+			match = self.parse_xkbswitch.match(output.decode())
+			group = match.group
+			variant = group('variant') if group('variant') else ''
+			self.layout = (group('group'), variant)
+		else:
+			self.layout = self.gsettings_get_layout()
+		changed = None
+		if self.prev_layout:
+			if self.layout != self.prev_layout:
+				changed = self.layout
+		elif self.layout != self.layouts[0]:
+			changed = self.layout
+		self.prev_layout = self.layout
+		return changed
+
 	def close(self):
 
 		self.stop = True
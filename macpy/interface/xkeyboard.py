@@ -2,18 +2,29 @@
 
 from __future__ import print_function
 import traceback
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
 from threading import Thread
 try:
 	from queue import Queue
 except ImportError:
 	from Queue import Queue
-import time
+from select import select
 from itertools import combinations
-from collections import deque
 from Xlib import display, X
 from Xlib.ext import record, xtest
-from Xlib.protocol import rq
-from .xhelper import XTranslate
+from .xhelper import XTranslate, enable_context_deferred, record_events
+from .xhelper import server_time
+from .reactor import Reactor, ReaderHandle
+from ..types.hotstrings import HotStrings
+from ..types.wakeup import Wakeup
+from ..types.stream import EventStream
+from ..types.hookqueue import HookQueue, QueuePolicy
+from ..types.meter import Meter
+from ..types.trace import Tracer, call, traced
+from ..types.tuples import QueueStats
 from ..key import Key, KeyState, Modifiers
 from ..constant.xmap import PRINT
 from ..event import KeyboardEvent, HotKey, HotString
@@ -25,16 +36,22 @@ class XKeyboard(object):
 
 		self.display = display.Display()
 		self.root = self.display.screen().root
-		self.translate = XTranslate()
-		self.translate.install_layout_hook()
-		self.queue = Queue()
-		self.mainloop = Thread(target=self._mainloop, name='XKeyboard mainloop')
-		self.mainloop.start()
+		self.translate = XTranslate.get(layout_hook=True)
+		self.loop = Reactor.get()
+		if self.loop:
+			self.queue = None
+			self.mainloop = None
+		else:
+			self.queue = Queue()
+			self.mainloop = Thread(
+				target=self._mainloop, name='XKeyboard mainloop')
+			self.mainloop.start()
 		self.hook = None
 		self.hook_grab = False
+		self.hook_queue = None
+		self.meter = None
 		self.hotkeys = None
-		self.input = deque(maxlen=128)
-		self.hotstrings = {}
+		self.hotstrings = HotStrings()
 
 	def _mainloop(self):
 
@@ -42,26 +59,46 @@ class XKeyboard(object):
 			method, args = self.queue.get()
 			if method is None:
 				break
-			try:
-				method(*args)
-			except Exception as e:
-				print('Error in XKeyboard mainloop: \n',
-					''.join(traceback.format_exception(
-						type(e), e, e.__traceback__)))
+			self.dispatch(method, args)
 			self.queue.task_done()
 
+	def dispatch(self, method, args):
+
+		try:
+			call(method, args)
+		except Exception as e:
+			print('Error in XKeyboard mainloop: \n',
+				''.join(traceback.format_exception(
+					type(e), e, e.__traceback__)))
+
 	def enqueue(self, method, *args):
 
-		self.queue.put_nowait((method, args))
+		tracer = Tracer.active
+		if tracer is not None and method is not None:
+			method = tracer.queued(method)
+		if self.loop:
+			self.loop.call_soon_threadsafe(self.dispatch, method, args)
+		else:
+			self.queue.put_nowait((method, args))
+
+	def enqueue_callback(self, callback, event):
+
+		if self.meter is not None:
+			self.enqueue(self.meter.dispatch, callback, event)
+		else:
+			self.enqueue(callback, event)
 
 	def close(self):
 
-		self.enqueue(None)
-		self.translate.close()
+		if not self.loop:
+			self.enqueue(None)
+		XTranslate.release()
 		if self.hook and self.hook.is_alive():
 			self.uninstall_keyboard_hook()
 		if self.hotkeys and self.hotkeys.is_alive():
 			self.uninit_hotkeys()
+		if self.loop:
+			Reactor.release()
 
 	def get_key_state(self, key):
 
@@ -76,9 +113,17 @@ class XKeyboard(object):
 		state = [bit for mask in keymap for bit in parse_bitmask(mask)]
 		return KeyState(bool(state[key.ec + self.translate.min_keycode]))
 
-	def install_keyboard_hook(self, callback, grab=False):
+	def install_keyboard_hook(
+			self, callback, grab=False, loop=None, maxsize=0,
+			policy=QueuePolicy.BLOCK, executor=None):
 
+		# A hook read by a foreign loop calls back on that loop directly
+		self.hook_loop = loop or self.loop
+		self.hook_direct = loop is not None
 		self.hook_callback = callback
+		self.hook_queue = HookQueue(
+			callback, self.dispatch, self.enqueue, maxsize, policy,
+			executor=executor, meter=self.meter)
 		self.hook_display = display.Display()
 		self.hook_ctx = self.hook_display.record_create_context(
 			0,
@@ -94,8 +139,18 @@ class XKeyboard(object):
 				'client_started': False,
 				'client_died': False,
 			}])
-		self.hook = Thread(target=self._hook, name='XKeyboard hook loop')
 		self.hook_grab = grab
+		if self.hook_loop:
+			if self.hook_grab:
+				self.root.grab_keyboard(
+					True, X.GrabModeAsync, X.GrabModeAsync, X.CurrentTime)
+				self.display.flush()
+			enable_context_deferred(
+				self.hook_display, self.hook_ctx, self.process_event)
+			self.hook = ReaderHandle(
+				self.hook_loop, (self.hook_display, ), self._record_ready)
+		else:
+			self.hook = Thread(target=self._hook, name='XKeyboard hook loop')
 		self.hook.start()
 
 	def uninstall_keyboard_hook(self):
@@ -106,8 +161,47 @@ class XKeyboard(object):
 				self.hook_grab = False
 			self.display.record_disable_context(self.hook_ctx)
 			self.display.flush()
-			self.hook_display.record_free_context(self.hook_ctx)
-			self.hook_display.close()
+			self.hook_queue.close()
+			if self.hook_loop:
+				self.hook.cancel(self._close_hook)
+			else:
+				self._close_hook()
+
+	def queue_stats(self):
+
+		if self.hook_queue:
+			return self.hook_queue.stats()
+		return QueueStats(0, 0, 0, 0)
+
+	def enable_stats(self, enable=True):
+
+		self.meter = Meter() if enable else None
+		if self.hook_queue:
+			self.hook_queue.meter = self.meter
+
+	def stats(self):
+
+		if self.meter is not None:
+			return self.meter.snapshot()
+		return None
+
+	def events(self, loop, grab=False):
+
+		stream = EventStream(loop, self.uninstall_keyboard_hook)
+		self.install_keyboard_hook(stream.push, grab, loop)
+		stream.reader = self.hook
+		return stream
+
+	def _close_hook(self):
+
+		self.hook_display.record_free_context(self.hook_ctx)
+		self.hook_display.close()
+
+	def _record_ready(self, hook_display):
+
+		# Parsing the replies of the deferred EnableContext request runs
+		# process_event for each of them
+		hook_display.pending_events()
 
 	def _hook(self):
 
@@ -123,6 +217,15 @@ class XKeyboard(object):
 			# no data and thus throws an error
 			pass
 
+	def dispatch_hook(self, event, etime):
+
+		event.source_time = server_time(etime)
+		if self.hook_direct:
+			self.hook_callback(event)
+		else:
+			self.hook_queue.push(event)
+
+	@traced('RECORD reply', 'hook')
 	def process_event(self, event):
 
 		if event.category != record.FromServer:
@@ -132,50 +235,46 @@ class XKeyboard(object):
 		if not len(event.data) or event.data[0] < 2:
 			return
 
-		data = event.data
-		while len(data):
-			event, data = rq.EventField(None).parse_binary_value(
-				data, self.hook_display.display, None, None)
-
-			if event.type in {X.KeyPress, X.KeyRelease}:
-				keystate = (KeyState.PRESSED if event.type == X.KeyPress
+		for etype, detail, etime, root_x, root_y, state in record_events(
+				event.data):
+			etype &= 0x7f
+			if etype == X.KeyPress or etype == X.KeyRelease:
+				keystate = (KeyState.PRESSED if etype == X.KeyPress
 					else KeyState.RELEASED)
+				tracer = Tracer.active
+				if tracer is not None:
+					start = monotonic()
 				keysym, mods, locks = self.translate.keycode_to_keysym(
-					event.detail, event.state)
+					detail, state)
+				if tracer is not None:
+					tracer.span('translate', 'translate', start, monotonic())
 				char = None
 				if (keysym in PRINT
-						and not any(mods[mod] for mod in mods
-							if mod not in {'SHIFT', 'ALTGR'})):
+						and not (mods.CTRL or mods.ALT or mods.META)):
 					char = PRINT[keysym]
-				key = Key.from_ec(event.detail - self.translate.min_keycode)
-				self.enqueue(self.hook_callback, KeyboardEvent(
-					key, keystate, char, mods, locks))
+				key = Key.from_ec(detail - self.translate.min_keycode)
+				self.dispatch_hook(KeyboardEvent(
+					key, keystate, char, mods, locks), etime)
 				# Using KeyPress for this eats some release events
-				if event.type == X.KeyRelease and self.hotstrings and char:
-					self.input.append(char)
-					string = ''.join(self.input)
-					for hotstring in self.hotstrings:
-						if (string.endswith(hotstring.string)
-								and not hotstring.triggers):
-							retstring = HotString(
-								hotstring.string, hotstring.triggers)
-							self.enqueue(self.hotstrings[hotstring], retstring)
-							self.input.clear()
-						elif (string[:-1].endswith(hotstring.string)
-								and string[-1] in hotstring.triggers):
-							retstring = HotString(
-								hotstring.string, hotstring.triggers, string[-1])
-							self.enqueue(self.hotstrings[hotstring], retstring)
-							self.input.clear()
+				if etype == X.KeyRelease and self.hotstrings and char:
+					for hotstring in self.hotstrings.feed(char):
+						self.enqueue_callback(self.hotstrings[hotstring], hotstring)
 
 	def init_hotkeys(self):
 
-		self.hotkeys = Thread(target=self._hotkeys, name='XKeyboard hotkey loop')
 		self.hk_display = display.Display()
 		self.hk_root = self.hk_display.screen().root
 		self.hk_root.change_attributes(event_mask=X.KeyPressMask)
 		self.hk_callbacks = {}
 		self.hk_stop = False
+		if self.loop:
+			self.hk_display.flush()
+			self.hotkeys = ReaderHandle(
+				self.loop, (self.hk_display, ), self._hotkeys_ready)
+		else:
+			self.hk_wakeup = Wakeup()
+			self.hotkeys = Thread(
+				target=self._hotkeys, name='XKeyboard hotkey loop')
 		self.hotkeys.start()
 
 	def uninit_hotkeys(self):
@@ -183,18 +282,41 @@ class XKeyboard(object):
 		for hotkey in self.hk_callbacks:
 			self.unregister_hotkey(hotkey)
 		self.hk_stop = True
+		if self.loop:
+			self.hotkeys.cancel()
+		else:
+			self.hk_wakeup.set()
+
+	def _hotkeys_wake(self):
+
+		# Flushing may have read events into Xlib's queue, let the hotkey
+		# loop drain them
+		if self.loop:
+			self._hotkeys_ready(self.hk_display)
+		else:
+			self.hk_wakeup.set()
 
 	def _hotkeys(self):
 
 		while not self.hk_stop:
-			for nevent in range(self.hk_display.pending_events()):
-				event = self.hk_display.next_event()
+			self.hk_wakeup.clear()
+			self._hotkeys_ready(self.hk_display)
+			if not self.hk_stop:
+				select((self.hk_display, self.hk_wakeup), (), ())
+		self.hk_wakeup.close()
+
+	def _hotkeys_ready(self, hk_display):
+
+		count = hk_display.pending_events()
+		while count:
+			for nevent in range(count):
+				event = hk_display.next_event()
 				if event.type == X.KeyPress:
 					keysym, mods, locks = self.translate.keycode_to_keysym(
 						event.detail, event.state)
 					key = Key.from_ec(event.detail - self.translate.min_keycode)
 					modifiers = []
-					for mod, state in mods.items():
+					for mod, state in zip(mods._fields, mods):
 						if state:
 							try:
 								modifiers.append(getattr(Modifiers, mod)[0])
@@ -203,8 +325,8 @@ class XKeyboard(object):
 									  # noqa ignore it here for consistency
 					hotkey = HotKey(key, modifiers)
 					if hotkey in self.hk_callbacks:
-						self.enqueue(self.hk_callbacks[hotkey], hotkey)
-			time.sleep(0.3)
+						self.enqueue_callback(self.hk_callbacks[hotkey], hotkey)
+			count = hk_display.pending_events()
 
 	def _register_hotkey(self, hotkey, callback):
 
@@ -227,6 +349,7 @@ class XKeyboard(object):
 					seen_masks.add(sum(masks))
 		self.hk_callbacks[hotkey] = callback
 		self.hk_display.flush()
+		self._hotkeys_wake()
 
 	def register_hotkey(self, key, modifiers, callback):
 
@@ -260,6 +383,7 @@ class XKeyboard(object):
 		if hotkey in self.hk_callbacks:
 			del self.hk_callbacks[hotkey]
 		self.hk_display.flush()
+		self._hotkeys_wake()
 
 	def unregister_hotkey(self, hotkey):
 
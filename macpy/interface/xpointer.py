@@ -9,19 +9,25 @@ from threading import Thread
 import traceback
 from Xlib import display, X
 from Xlib.ext import record, xtest
-from Xlib.protocol import rq, event
-from .xhelper import XTranslate
+from Xlib.protocol import event
+from .xhelper import XTranslate, enable_context_deferred, record_events
+from .xhelper import server_time
+from .reactor import Reactor, ReaderHandle
 from ..key import Key, KeyState
 from ..event import PointerAxis
 from ..event import PointerEventMotion, PointerEventButton, PointerEventAxis
-from ..types.tuples import MousePos, Modifiers
+from ..types.tuples import MousePos, Modifiers, QueueStats
+from ..types.stream import EventStream
+from ..types.hookqueue import HookQueue, QueuePolicy
+from ..types.meter import Meter
+from ..types.trace import Tracer, call, traced
 
 
 class XPointer(object):
 
 	def __init__(self):
 
-		self.translate = XTranslate()
+		self.translate = XTranslate.get(layout_hook=True)
 		self.display = display.Display()
 		self.root = self.display.screen().root
 
@@ -46,11 +52,19 @@ class XPointer(object):
 			Key.BTN_SIDE: 1 << 15,
 			Key.BTN_EXTRA: 1 << 16}
 
-		self.queue = Queue()
-		self.mainloop = Thread(target=self._mainloop, name='XPointer mainloop')
-		self.mainloop.start()
+		self.loop = Reactor.get()
+		if self.loop:
+			self.queue = None
+			self.mainloop = None
+		else:
+			self.queue = Queue()
+			self.mainloop = Thread(
+				target=self._mainloop, name='XPointer mainloop')
+			self.mainloop.start()
 		self.hook = None
 		self.hook_grab = False
+		self.hook_queue = None
+		self.meter = None
 
 	def _mainloop(self):
 
@@ -58,23 +72,40 @@ class XPointer(object):
 			method, args = self.queue.get()
 			if method is None:
 				break
-			try:
-				method(*args)
-			except Exception as e:
-				print(
-					'Error in XPointer mainloop: \n',
-					''.join(traceback.format_exception(
-						type(e), e, e.__traceback__)))
+			self.dispatch(method, args)
 			self.queue.task_done()
 
+	def dispatch(self, method, args):
+
+		try:
+			call(method, args)
+		except Exception as e:
+			print(
+				'Error in XPointer mainloop: \n',
+				''.join(traceback.format_exception(
+					type(e), e, e.__traceback__)))
+
 	def enqueue(self, method, *args):
 
-		self.queue.put_nowait((method, args))
+		tracer = Tracer.active
+		if tracer is not None and method is not None:
+			method = tracer.queued(method)
+		if self.loop:
+			self.loop.call_soon_threadsafe(self.dispatch, method, args)
+		else:
+			self.queue.put_nowait((method, args))
 
-	def install_pointer_hook(self, callback, grab=False):
+	def install_pointer_hook(
+			self, callback, grab=False, loop=None, maxsize=0,
+			policy=QueuePolicy.BLOCK, executor=None):
 
-		self.hook = Thread(target=self._hook, name='XPointer hook loop')
+		# A hook read by a foreign loop calls back on that loop directly
+		self.hook_loop = loop or self.loop
+		self.hook_direct = loop is not None
 		self.hook_callback = callback
+		self.hook_queue = HookQueue(
+			callback, self.dispatch, self.enqueue, maxsize, policy,
+			executor=executor, meter=self.meter)
 		self.hook_display = display.Display()
 		self.hook_ctx = self.hook_display.record_create_context(
 			0,
@@ -91,6 +122,20 @@ class XPointer(object):
 				'client_died': False,
 			}])
 		self.hook_grab = grab
+		if self.hook_loop:
+			if self.hook_grab:
+				mask = (X.ButtonMotionMask | X.ButtonPressMask
+					| X.ButtonReleaseMask | X.PointerMotionMask)
+				self.root.grab_pointer(
+					True, mask, X.GrabModeAsync, X.GrabModeAsync,
+					X.NONE, X.NONE, X.CurrentTime)
+				self.display.flush()
+			enable_context_deferred(
+				self.hook_display, self.hook_ctx, self.process_events)
+			self.hook = ReaderHandle(
+				self.hook_loop, (self.hook_display, ), self._record_ready)
+		else:
+			self.hook = Thread(target=self._hook, name='XPointer hook loop')
 		self.hook.start()
 
 	def uninstall_pointer_hook(self):
@@ -101,8 +146,45 @@ class XPointer(object):
 				self.hook_grab = False
 			self.display.record_disable_context(self.hook_ctx)
 			self.display.flush()
-			self.hook_display.record_free_context(self.hook_ctx)
-			self.hook_display.close()
+			self.hook_queue.close()
+			if self.hook_loop:
+				self.hook.cancel(self._close_hook)
+			else:
+				self._close_hook()
+
+	def queue_stats(self):
+
+		if self.hook_queue:
+			return self.hook_queue.stats()
+		return QueueStats(0, 0, 0, 0)
+
+	def enable_stats(self, enable=True):
+
+		self.meter = Meter() if enable else None
+		if self.hook_queue:
+			self.hook_queue.meter = self.meter
+
+	def stats(self):
+
+		if self.meter is not None:
+			return self.meter.snapshot()
+		return None
+
+	def events(self, loop, grab=False):
+
+		stream = EventStream(loop, self.uninstall_pointer_hook)
+		self.install_pointer_hook(stream.push, grab, loop)
+		stream.reader = self.hook
+		return stream
+
+	def _close_hook(self):
+
+		self.hook_display.record_free_context(self.hook_ctx)
+		self.hook_display.close()
+
+	def _record_ready(self, hook_display):
+
+		hook_display.pending_events()
 
 	def _hook(self):
 
@@ -121,6 +203,15 @@ class XPointer(object):
 			# no data and thus throws an error
 			pass
 
+	def dispatch_hook(self, event, etime):
+
+		event.source_time = server_time(etime)
+		if self.hook_direct:
+			self.hook_callback(event)
+		else:
+			self.hook_queue.push(event)
+
+	@traced('RECORD reply', 'hook')
 	def process_events(self, event):
 
 		if event.category != record.FromServer:
@@ -130,37 +221,21 @@ class XPointer(object):
 		if not len(event.data) or event.data[0] < 2:
 			return
 
-		data = event.data
-		while len(data):
-			event, data = rq.EventField(None).parse_binary_value(
-				data, self.hook_display.display, None, None)
-			mods = {
-				'SHIFT': False,
-				'ALTGR': False,
-				'CTRL': False,
-				'ALT': False,
-				'META': False}
-			if event.state & self.translate.modmask['SHIFT']:
-				mods['SHIFT'] = True
-			if event.state & self.translate.modmask['ALTGR']:
-				mods['ALTGR'] = True
-			if event.state & self.translate.modmask['CTRL']:
-				mods['CTRL'] = True
-			if event.state & self.translate.modmask['ALT']:
-				mods['ALT'] = True
-			if event.state & self.translate.modmask['META']:
-				mods['META'] = True
-			if event.type == X.MotionNotify:
-				self.enqueue(self.hook_callback, PointerEventMotion(
-					event.root_x, event.root_y, mods))
-			elif event.type in {X.ButtonPress, X.ButtonRelease}:
-				button = event.detail
-				state = (KeyState.PRESSED if event.type == X.ButtonPress
+		state_mods = self.translate.state_mods
+		for etype, button, etime, root_x, root_y, mask in record_events(
+				event.data):
+			etype &= 0x7f
+			mods = state_mods[mask & 0xff]
+			if etype == X.MotionNotify:
+				self.dispatch_hook(
+					PointerEventMotion(root_x, root_y, mods), etime)
+			elif etype == X.ButtonPress or etype == X.ButtonRelease:
+				state = (KeyState.PRESSED if etype == X.ButtonPress
 					else KeyState.RELEASED)
 				if button in {1, 2, 3, 8, 9}:
-					self.enqueue(self.hook_callback, PointerEventButton(
-						event.root_x, event.root_y,
-						self.buttonmap[button], state, mods))
+					self.dispatch_hook(PointerEventButton(
+						root_x, root_y, self.buttonmap[button], state, mods),
+						etime)
 				elif button in {4, 5, 6, 7}:
 					axis = (PointerAxis.VERTICAL if button in {4, 5}
 						else PointerAxis.HORIZONTAL)
@@ -168,15 +243,18 @@ class XPointer(object):
 						value = -1
 					else:
 						value = 1
-					self.enqueue(self.hook_callback, PointerEventAxis(
-						event.root_x, event.root_y,
-						value, axis, mods))
+					self.dispatch_hook(PointerEventAxis(
+						root_x, root_y, value, axis, mods), etime)
 
 	def close(self):
 
 		if self.hook and self.hook.is_alive():
 			self.uninstall_pointer_hook()
-		self.enqueue(None)
+		XTranslate.release()
+		if self.loop:
+			Reactor.release()
+		else:
+			self.enqueue(None)
 
 	def _warp(self, x, y, relative=False):
 
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 
-import time
-from threading import Thread
+from threading import Thread, Lock
+from select import select
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
 from six import with_metaclass
-from Xlib import display, X, Xutil
+from Xlib import display, X, Xutil, Xatom
+from Xlib.protocol import request
 from Xlib.protocol import event as xevent
-from Xlib.error import BadWindow, DisplayNameError
+from Xlib.error import BadWindow, BadDrawable, DisplayNameError
 from ..types.metawindow import MetaWindow
 from ..constant.xatom import NET_WM_PID, NET_WM_VISIBLE_NAME, NET_WM_NAME
 from ..constant.xatom import NET_CLIENT_LIST, NET_ACTIVE_WINDOW, WM_STATE
@@ -17,11 +22,233 @@ from ..constant.xatom import NET_CLOSE_WINDOW
 from ..event import WindowEventType as WinEType, WindowEvent, WindowState
 from ..event import KeyboardEvent, PointerEventMotion, PointerEventButton
 from ..event import PointerEventAxis, PointerAxis
-from ..types.tuples import WinPos, WinSize
+from ..types.tuples import WinPos, WinSize, WinGeometry, WindowRecord
+from ..types.tuples import CacheStats
 from ..types.dummy import Display
-from .xhelper import XTranslate
+from ..types.wakeup import Wakeup
+from ..types.stream import EventStream
+from ..types.meter import Meter
+from ..types.trace import traced
+from .xhelper import XTranslate, server_time
+from .reactor import Reactor, ReaderHandle
 from ..key import Key, KeyState
 
+class XWindowCache(object):
+
+	def __init__(self):
+
+		self.display = display.Display()
+		self.root = self.display.screen().root
+		# Atoms whose PropertyNotify invalidates a cached value
+		self.atom_keys = {
+			NET_WM_VISIBLE_NAME: 'title',
+			NET_WM_NAME: 'title',
+			Xatom.WM_CLASS: 'wm_class',
+			NET_WM_PID: 'pid',
+			WM_STATE: 'state',
+			NET_WM_STATE: 'state',
+			NET_ACTIVE_WINDOW: 'active'}
+		self.lock = Lock()
+		self.entries = {}
+		# Bumped on every invalidation and never reused, so a fetch that
+		# started before one can't be cached after it, even if the entry
+		# was dropped and created again meanwhile
+		self.generation = 0
+		self.generations = {}
+		self.hits = 0
+		self.misses = 0
+		self.invalidations = 0
+		self.stop = False
+		self.wakeup = Wakeup()
+		self.thread = Thread(target=self._run, name='XWindow cache loop')
+		self.thread.start()
+
+	def get(self, xid, key, fetch):
+
+		with self.lock:
+			entry = self.entries.get(xid)
+			if entry is not None and key in entry:
+				self.hits += 1
+				return entry[key]
+			self.misses += 1
+			xwindow = self.display.create_resource_object('window', xid)
+			if entry is None:
+				self.entries[xid] = {}
+				self.generation += 1
+				self.generations[xid] = self.generation
+				# Queued under the lock so any fetch for this window goes out
+				# after the subscription on the same connection
+				mask = X.PropertyChangeMask | X.StructureNotifyMask
+				xwindow.change_attributes(
+					event_mask=mask, onerror=lambda *args: None)
+			generation = self.generations[xid]
+		value = fetch(xwindow)
+		with self.lock:
+			entry = self.entries.get(xid)
+			if entry is not None and self.generations[xid] == generation:
+				entry[key] = value
+		# Waiting for the reply may have read events into Xlib's queue
+		self.wakeup.set()
+		return value
+
+	def invalidate(self, xid, key=None):
+
+		with self.lock:
+			entry = self.entries.get(xid)
+			if entry is not None:
+				self.generation += 1
+				self.generations[xid] = self.generation
+				if key is None:
+					del self.entries[xid]
+					del self.generations[xid]
+					self.invalidations += len(entry)
+				elif key in entry:
+					del entry[key]
+					self.invalidations += 1
+
+	def stats(self):
+
+		return CacheStats(self.hits, self.misses, self.invalidations)
+
+	def _run(self):
+
+		while not self.stop:
+			self.wakeup.clear()
+			for nevent in range(self.display.pending_events()):
+				event = self.display.next_event()
+				if event.type == X.PropertyNotify:
+					key = self.atom_keys.get(event.atom)
+					if key:
+						self.invalidate(event.window.id, key)
+				elif event.type == X.ConfigureNotify:
+					self.invalidate(event.window.id, 'geometry')
+				elif event.type == X.ReparentNotify:
+					self.invalidate(event.window.id, 'geometry')
+					self.invalidate(event.window.id, 'parent')
+				elif event.type == X.DestroyNotify:
+					self.invalidate(event.window.id)
+			if not self.stop:
+				select((self.display, self.wakeup), (), ())
+		self.wakeup.close()
+		self.display.close()
+
+	def close(self):
+
+		self.stop = True
+		self.wakeup.set()
+		self.thread.join()
+
+
+def match_title(pattern, title):
+
+	if title is None:
+		return False
+	if hasattr(pattern, 'search'):
+		return pattern.search(title) is not None
+	return pattern in title
+
+
+class XWindowIndex(object):
+
+	def __init__(self):
+
+		self.lock = Lock()
+		self.records = {}
+		# Dicts with None values are used as insertion ordered sets
+		self.by_class = {}
+		self.by_pid = {}
+		# Windows whose title comes from a parent, by every window on the
+		# way up to it
+		self.ancestors = {}
+		self.by_ancestor = {}
+
+	def get(self, xid):
+
+		return self.records.get(xid)
+
+	def add(self, record):
+
+		# Updated records keep their place, so find() returns windows in
+		# client list order like the snapshot does
+		with self.lock:
+			old = self.records.get(record.id)
+			if (old is None or old.wm_class != record.wm_class
+					or old.pid != record.pid):
+				self._unlink(record.id)
+				if record.wm_class is not None:
+					self.by_class.setdefault(
+						record.wm_class, {})[record.id] = None
+				if record.pid is not None:
+					self.by_pid.setdefault(record.pid, {})[record.id] = None
+			self.records[record.id] = record
+
+	def update(self, xid, **fields):
+
+		record = self.records.get(xid)
+		if record is not None:
+			self.add(record._replace(**fields))
+
+	def remove(self, xid):
+
+		with self.lock:
+			self._remove(xid)
+
+	def set_ancestors(self, xid, ancestors):
+
+		with self.lock:
+			self._unlink_ancestors(xid)
+			if ancestors:
+				self.ancestors[xid] = tuple(ancestors)
+				for ancestor in ancestors:
+					self.by_ancestor.setdefault(ancestor, {})[xid] = None
+
+	def titled_by(self, ancestor):
+
+		with self.lock:
+			return tuple(self.by_ancestor.get(ancestor, ()))
+
+	def _remove(self, xid):
+
+		self._unlink(xid)
+		self.records.pop(xid, None)
+		self._unlink_ancestors(xid)
+
+	def _unlink_ancestors(self, xid):
+
+		for ancestor in self.ancestors.pop(xid, ()):
+			xids = self.by_ancestor.get(ancestor)
+			if xids is not None:
+				xids.pop(xid, None)
+				if not xids:
+					del self.by_ancestor[ancestor]
+
+	def _unlink(self, xid):
+
+		record = self.records.get(xid)
+		if record is not None:
+			for mapping, key in (
+					(self.by_class, record.wm_class), (self.by_pid, record.pid)):
+				xids = mapping.get(key)
+				if xids is not None:
+					xids.pop(xid, None)
+					if not xids:
+						del mapping[key]
+
+	def find(self, wm_class=None, title=None, pid=None):
+
+		with self.lock:
+			if wm_class is not None:
+				xids = self.by_class.get(wm_class, ())
+			elif pid is not None:
+				xids = self.by_pid.get(pid, ())
+			else:
+				xids = self.records
+			records = [self.records[xid] for xid in xids]
+		return [record.id for record in records
+			if (pid is None or record.pid == pid)
+				and (title is None or match_title(title, record.title))]
+
+
 class XWindow(with_metaclass(MetaWindow)):
 
 	try:
@@ -31,6 +258,10 @@ class XWindow(with_metaclass(MetaWindow)):
 	root = disp.screen().root
 
 	hook = None
+	hook_loop = None
+	meter = None
+	cache = None
+	index = None
 
 	def __init__(self, xid):
 
@@ -38,10 +269,15 @@ class XWindow(with_metaclass(MetaWindow)):
 			self.xwindow = self.disp.create_resource_object('window', xid)
 		except BadWindow:
 			self.xwindow = None
-		self.wm_class = self.get_wm_class()
-		self.pid = self.get_pid()
+		index = self.index
+		record = index.get(xid) if index is not None else None
+		if record is not None:
+			self.wm_class = record.wm_class
+			self.pid = record.pid
+		else:
+			self.wm_class = self.get_wm_class()
+			self.pid = self.get_pid()
 
-		self.translate = XTranslate()
 		self.rebuttonmap = {
 			Key.BTN_LEFT: 1,
 			Key.BTN_MOUSE: 1,
@@ -54,12 +290,58 @@ class XWindow(with_metaclass(MetaWindow)):
 
 		return hash(self.xwindow.id)
 
-	def get_wm_class(self):
+	@property
+	def translate(self):
+
+		return XTranslate.get()
+
+	def cached(self, key, fetch):
 
-		if self.xwindow:
+		cache = self.cache
+		if cache is not None and self.xwindow:
+			return cache.get(self.xwindow.id, key, fetch)
+		return fetch(self.xwindow)
+
+	@classmethod
+	def enable_cache(cls):
+
+		if cls.cache is None:
+			cls.cache = XWindowCache()
+
+	@classmethod
+	def disable_cache(cls):
+
+		if cls.cache is not None:
+			cache = cls.cache
+			cls.cache = None
+			cache.close()
+
+	@classmethod
+	def cache_stats(cls):
+
+		if cls.cache is not None:
+			return cls.cache.stats()
+		return None
+
+	@classmethod
+	def enable_stats(cls, enable=True):
+
+		cls.meter = Meter() if enable else None
+
+	@classmethod
+	def stats(cls):
+
+		if cls.meter is not None:
+			return cls.meter.snapshot()
+		return None
+
+	@staticmethod
+	def fetch_wm_class(xwindow):
+
+		if xwindow:
 			try:
 				try:
-					wm_class = self.xwindow.get_wm_class()
+					wm_class = xwindow.get_wm_class()
 					if wm_class:
 						return '{0}.{1}'.format(*wm_class)
 				except AttributeError:
@@ -68,12 +350,17 @@ class XWindow(with_metaclass(MetaWindow)):
 				pass
 		return None
 
-	def get_pid(self):
+	def get_wm_class(self):
+
+		return self.cached('wm_class', self.fetch_wm_class)
 
-		if self.xwindow:
+	@staticmethod
+	def fetch_pid(xwindow):
+
+		if xwindow:
 			try:
 				try:
-					prop = self.xwindow.get_full_property(
+					prop = xwindow.get_full_property(
 						NET_WM_PID, X.AnyPropertyType)
 					if prop:
 						return prop.value[0]
@@ -83,42 +370,89 @@ class XWindow(with_metaclass(MetaWindow)):
 				pass
 		return None
 
-	@property
-	def title(self):
+	def get_pid(self):
 
-		def get_title(xwindow):
+		return self.cached('pid', self.fetch_pid)
 
-			try:
-				if type(xwindow) is not int:
+	@staticmethod
+	def fetch_own_title(xwindow):
+
+		try:
+			if xwindow and type(xwindow) is not int:
+				prop = xwindow.get_full_property(
+					NET_WM_VISIBLE_NAME, X.AnyPropertyType)
+				if not prop:
 					prop = xwindow.get_full_property(
-						NET_WM_VISIBLE_NAME, X.AnyPropertyType)
-					if not prop:
-						prop = xwindow.get_full_property(
-							NET_WM_NAME, X.AnyPropertyType)
-					if prop:
-						if type(prop.value) is bytes:
-							return prop.value.decode()
-						else:
-							return prop.value
+						NET_WM_NAME, X.AnyPropertyType)
+				if prop:
+					if type(prop.value) is bytes:
+						return prop.value.decode()
 					else:
-						return get_title(xwindow.query_tree().parent)
+						return prop.value
+		except BadWindow:
+			pass
+		return None
+
+	@staticmethod
+	def fetch_parent(xwindow):
+
+		try:
+			if xwindow and type(xwindow) is not int:
+				parent = xwindow.query_tree().parent
+				return parent if type(parent) is int else parent.id
+		except BadWindow:
+			pass
+		return 0
+
+	@staticmethod
+	def fetch_title(xwindow):
+
+		# Windows without a title of their own take their parent's
+		title = XWindow.fetch_own_title(xwindow)
+		if title is None and xwindow and type(xwindow) is not int:
+			try:
+				return XWindow.fetch_title(xwindow.query_tree().parent)
 			except BadWindow:
 				pass
-			return None
+		return title
+
+	@property
+	def title(self):
 
-		if self.xwindow:
-			return get_title(self.xwindow)
+		if not self.xwindow:
+			return None
+		cache = self.cache
+		if cache is None:
+			return self.fetch_title(self.xwindow)
+		# Each window's own title is cached in its own entry, so a title
+		# change on the parent invalidates what the child falls back to
+		xid = self.xwindow.id
+		while xid:
+			title = cache.get(xid, 'title', self.fetch_own_title)
+			if title is not None:
+				return title
+			xid = cache.get(xid, 'parent', self.fetch_parent)
 		return None
 
 	@classmethod
-	def install_window_hook(cls, callback):
+	def install_window_hook(cls, callback, loop=None):
 
 		cls.stop = False
 		cls.hook_callback = callback
 		cls.hook_display = display.Display()
 		cls.hook_root = cls.hook_display.screen().root
 		cls.hook_root.change_attributes(event_mask=X.PropertyChangeMask)
-		cls.hook = Thread(target=cls._hook, name='XWindow hook loop')
+		cls.hook_wakeups = 0
+		cls.hook_started = monotonic()
+		cls.hook_reactor = loop is None and Reactor.enabled
+		cls.hook_loop = Reactor.get() if cls.hook_reactor else loop
+		if cls.hook_loop:
+			cls.hook = ReaderHandle(
+				cls.hook_loop, (cls.hook_display, ), cls._hook_ready)
+			cls.hook_loop.call_soon_threadsafe(cls._hook_start)
+		else:
+			cls.hook_wakeup = Wakeup()
+			cls.hook = Thread(target=cls._hook, name='XWindow hook loop')
 		cls.hook.start()
 
 	@classmethod
@@ -126,39 +460,154 @@ class XWindow(with_metaclass(MetaWindow)):
 
 		if cls.hook and cls.hook.is_alive():
 			cls.stop = True
-			cls.hook.join()
+			if cls.hook_loop:
+				cls.hook.cancel(cls._hook_stop)
+				if cls.hook_reactor:
+					Reactor.release()
+			else:
+				cls.hook_wakeup.set()
+				cls.hook.join()
 			cls.hook_display.close()
 			del cls.hook_root
 			del cls.hook_display
 
+	@classmethod
+	def events(cls, loop, callback=None):
+
+		# callback lets the caller convert events before pushing them
+		stream = EventStream(loop, cls.uninstall_window_hook)
+		cls.install_window_hook(callback or stream.push, loop)
+		stream.reader = cls.hook
+		return stream
+
+	@classmethod
+	def hook_wakeup_rate(cls):
+
+		if cls.hook:
+			return cls.hook_wakeups / (monotonic() - cls.hook_started)
+		return 0.0
+
+	@classmethod
+	def track_windows(cls, xids, fields=('title', 'wm_class', 'pid')):
+
+		for xid in xids:
+			xwindow = cls.hook_display.create_resource_object('window', xid)
+			xwindow.change_attributes(
+				event_mask=X.PropertyChangeMask, onerror=lambda *args: None)
+		# Fetched over the hook connection after subscribing, so no change
+		# can slip in between
+		ancestors = {}
+		for record in cls._snapshot(cls.hook_display, xids, fields, ancestors):
+			if 'title' in fields and 'wm_class' in fields:
+				cls.index.add(record)
+			else:
+				cls.index.update(record.id, **{
+					field: getattr(record, field) for field in fields})
+		if 'title' in fields:
+			# Titles taken from a parent change with the parent's, so the
+			# parents looked at are followed too
+			for xid in xids:
+				for ancestor in ancestors.get(xid, ()):
+					xwindow = cls.hook_display.create_resource_object(
+						'window', ancestor)
+					xwindow.change_attributes(
+						event_mask=X.PropertyChangeMask,
+						onerror=lambda *args: None)
+				cls.index.set_ancestors(xid, ancestors.get(xid))
+
 	@classmethod
 	def _hook(cls):
 
+		cls._hook_start()
+		while not cls.stop:
+			cls.hook_wakeup.clear()
+			cls._hook_ready(cls.hook_display)
+			# Only wait on the socket while Xlib holds no events of its own
+			if not cls.stop and not cls.hook_display.pending_events():
+				select((cls.hook_display, cls.hook_wakeup), (), ())
+				cls.hook_wakeups += 1
+		cls._hook_stop()
+		cls.hook_wakeup.close()
+
+	@classmethod
+	def _hook_start(cls):
+
 		prop = cls.hook_root.get_full_property(
 			NET_CLIENT_LIST, X.AnyPropertyType)
-		xid_list = prop.value
-		while not cls.stop:
-			for nevent in range(cls.hook_display.pending_events()):
-				event = cls.hook_display.next_event()
-				if event.type == X.PropertyNotify:
-					if event.atom == NET_ACTIVE_WINDOW:
-						prop = cls.hook_root.get_full_property(
-							NET_ACTIVE_WINDOW, X.AnyPropertyType)
-						cls.hook_callback(WindowEvent(
-							cls(prop.value[0]), WinEType.FOCUSED))
-					if event.atom == NET_CLIENT_LIST:
-						prop = cls.hook_root.get_full_property(
-							NET_CLIENT_LIST, X.AnyPropertyType)
-						for xid in prop.value:
-							if xid not in xid_list:
-								cls.hook_callback(WindowEvent(
-									cls(xid), WinEType.CREATED))
-						for xid in xid_list:
-							if xid not in prop.value:
-								cls.hook_callback(WindowEvent(
-									cls(xid), WinEType.DESTROYED))
-						xid_list = prop.value
-		time.sleep(0.005)
+		cls.hook_xids = set(prop.value)
+		cls.index = XWindowIndex()
+		cls.track_windows(prop.value)
+		if cls.hook_loop:
+			# Replies above may have read events into Xlib's queue
+			cls._hook_ready(cls.hook_display)
+
+	@classmethod
+	def _hook_stop(cls):
+
+		cls.index = None
+
+	@classmethod
+	def dispatch_hook(cls, window_event, etime):
+
+		# Window events are passed on right away from the hook's thread
+		window_event.source_time = server_time(etime)
+		meter = cls.meter
+		if meter is not None:
+			meter.queued(0)
+			meter.dispatch(cls.hook_callback, window_event)
+		else:
+			window_event.dispatch_time = monotonic()
+			cls.hook_callback(window_event)
+
+	@classmethod
+	@traced('window events', 'hook')
+	def _hook_ready(cls, hook_display):
+
+		atom_fields = {
+			NET_WM_VISIBLE_NAME: 'title',
+			NET_WM_NAME: 'title',
+			Xatom.WM_CLASS: 'wm_class',
+			NET_WM_PID: 'pid'}
+		if cls.hook_loop:
+			cls.hook_wakeups += 1
+		# Property requests below are round trips that may read further
+		# events into Xlib's queue, which leaves nothing on the socket to
+		# wake select up, so this loops until none are pending
+		count = hook_display.pending_events()
+		while count and not cls.stop:
+			for nevent in range(count):
+				event = hook_display.next_event()
+				if event.type != X.PropertyNotify:
+					continue
+				if event.window.id != cls.hook_root.id:
+					field = atom_fields.get(event.atom)
+					if field and event.window.id in cls.hook_xids:
+						cls.track_windows((event.window.id, ), (field, ))
+					if field == 'title':
+						titled = cls.index.titled_by(event.window.id)
+						if titled:
+							cls.track_windows(titled, (field, ))
+					continue
+				if event.atom == NET_ACTIVE_WINDOW:
+					prop = cls.hook_root.get_full_property(
+						NET_ACTIVE_WINDOW, X.AnyPropertyType)
+					cls.dispatch_hook(WindowEvent(
+						cls(prop.value[0]), WinEType.FOCUSED), event.time)
+				if event.atom == NET_CLIENT_LIST:
+					prop = cls.hook_root.get_full_property(
+						NET_CLIENT_LIST, X.AnyPropertyType)
+					new_set = set(prop.value)
+					created = new_set - cls.hook_xids
+					cls.track_windows(created)
+					for xid in created:
+						cls.dispatch_hook(WindowEvent(
+							cls(xid), WinEType.CREATED), event.time)
+					for xid in cls.hook_xids - new_set:
+						cls.dispatch_hook(WindowEvent(
+							cls(xid), WinEType.DESTROYED), event.time)
+						cls.index.remove(xid)
+					cls.hook_xids = new_set
+			count = hook_display.pending_events()
 
 	@classmethod
 	def list_windows(cls):
@@ -169,11 +618,178 @@ class XWindow(with_metaclass(MetaWindow)):
 			window_list.append(cls(xid))
 		return tuple(window_list)
 
+	@classmethod
+	def _request_property(cls, disp, xid, atom):
+
+		return request.GetProperty(
+			display=disp.display,
+			defer=True,
+			delete=False,
+			window=xid,
+			property=atom,
+			type=X.AnyPropertyType,
+			long_offset=0,
+			long_length=1 << 16)
+
+	@classmethod
+	def _reply_value(cls, reply):
+
+		try:
+			reply.reply()
+			if reply.property_type:
+				return reply.value[1]
+		except BadWindow:
+			pass
+		return None
+
+	@classmethod
+	def _request_title(cls, disp, xid):
+
+		return (
+			cls._request_property(disp, xid, NET_WM_VISIBLE_NAME),
+			cls._request_property(disp, xid, NET_WM_NAME))
+
+	@classmethod
+	def _reply_title(cls, replies):
+
+		title = None
+		for reply in replies:
+			value = cls._reply_value(reply)
+			if value and title is None:
+				title = value.decode() if type(value) is bytes else value
+		return title
+
+	@classmethod
+	def _parent_titles(cls, disp, xids, visited=None):
+
+		# Like fetch_title, windows without a title take their parent's.
+		# Each level up the tree takes one pipelined round for the parents
+		# and one for their titles, usually just the frame and the root.
+		# The parents asked for each window are added to visited.
+		titles = {}
+		ancestors = {xid: xid for xid in xids}
+		while ancestors:
+			trees = [
+				(xid, request.QueryTree(
+					display=disp.display, defer=True, window=ancestor))
+				for xid, ancestor in ancestors.items()]
+			disp.flush()
+			parents = []
+			for xid, tree in trees:
+				try:
+					tree.reply()
+				except BadWindow:
+					continue
+				parent = tree.parent
+				parent = parent if type(parent) is int else parent.id
+				if parent:
+					parents.append(
+						(xid, parent, cls._request_title(disp, parent)))
+					if visited is not None:
+						visited.setdefault(xid, []).append(parent)
+			disp.flush()
+			ancestors = {}
+			for xid, parent, replies in parents:
+				title = cls._reply_title(replies)
+				if title is None:
+					ancestors[xid] = parent
+				else:
+					titles[xid] = title
+		return titles
+
+	@classmethod
+	def snapshot(cls, fields):
+
+		prop = cls.root.get_full_property(NET_CLIENT_LIST, X.AnyPropertyType)
+		xids = prop.value if prop else ()
+		return cls._snapshot(cls.disp, xids, fields)
+
+	@classmethod
+	def _snapshot(cls, disp, xids, fields, visited=None):
+
+		# Send every request for every window before reading any reply,
+		# so the whole desktop is fetched in about one round trip
+		pending = []
+		for xid in xids:
+			requests = {}
+			if 'title' in fields:
+				requests['title'] = cls._request_title(disp, xid)
+			if 'wm_class' in fields:
+				requests['wm_class'] = cls._request_property(
+					disp, xid, Xatom.WM_CLASS)
+			if 'pid' in fields:
+				requests['pid'] = cls._request_property(disp, xid, NET_WM_PID)
+			if 'geometry' in fields:
+				requests['geometry'] = request.GetGeometry(
+					display=disp.display, defer=True, drawable=xid)
+			if 'state' in fields:
+				requests['state'] = (
+					cls._request_property(disp, xid, WM_STATE),
+					cls._request_property(disp, xid, NET_WM_STATE))
+			pending.append((xid, requests))
+		disp.flush()
+
+		records = []
+		for xid, requests in pending:
+			values = {}
+			if 'title' in requests:
+				values['title'] = cls._reply_title(requests['title'])
+			if 'wm_class' in requests:
+				value = cls._reply_value(requests['wm_class'])
+				if value:
+					parts = value.split(b'\0')
+					if len(parts) > 1:
+						values['wm_class'] = '{0}.{1}'.format(
+							parts[0].decode(), parts[1].decode())
+			if 'pid' in requests:
+				value = cls._reply_value(requests['pid'])
+				if value:
+					values['pid'] = value[0]
+			if 'geometry' in requests:
+				try:
+					geometry = requests['geometry']
+					geometry.reply()
+					values['geometry'] = WinGeometry(
+						geometry.x, geometry.y, geometry.width, geometry.height)
+				except (BadWindow, BadDrawable):
+					pass
+			if 'state' in requests:
+				min_state = cls._reply_value(requests['state'][0])
+				max_state = cls._reply_value(requests['state'][1])
+				if min_state is not None or max_state is not None:
+					if min_state and min_state[0] == Xutil.IconicState:
+						values['state'] = WindowState.MINIMIZED
+					elif (max_state
+							and NET_WM_STATE_MAXIMIZED_VERT in max_state
+							and NET_WM_STATE_MAXIMIZED_HORZ in max_state):
+						values['state'] = WindowState.MAXIMIZED
+					else:
+						values['state'] = WindowState.NORMAL
+			records.append((xid, values))
+
+		if 'title' in fields:
+			titles = cls._parent_titles(disp, [
+				xid for xid, values in records if values['title'] is None],
+				visited)
+			for xid, values in records:
+				if xid in titles:
+					values['title'] = titles[xid]
+		return tuple(WindowRecord(xid, **values) for xid, values in records)
+
+	@staticmethod
+	def fetch_active(xwindow):
+
+		prop = xwindow.get_full_property(NET_ACTIVE_WINDOW, X.AnyPropertyType)
+		return prop.value[0]
+
 	@classmethod
 	def get_active(cls):
 
-		prop = cls.root.get_full_property(NET_ACTIVE_WINDOW, X.AnyPropertyType)
-		return cls(prop.value[0])
+		if cls.cache is not None:
+			xid = cls.cache.get(cls.root.id, 'active', cls.fetch_active)
+		else:
+			xid = cls.fetch_active(cls.root)
+		return cls(xid)
 
 	@classmethod
 	def get_under_pointer(cls):
@@ -194,45 +810,71 @@ class XWindow(with_metaclass(MetaWindow)):
 			return get_child(xwindow)
 		return window
 
+	@classmethod
+	def find_all(cls, wm_class=None, title=None, pid=None):
+
+		index = cls.index
+		if index is not None:
+			return tuple(cls(xid) for xid in index.find(wm_class, title, pid))
+		fields = ('title', 'wm_class', 'pid') if title is not None else (
+			'wm_class', 'pid')
+		return tuple(cls(record.id) for record in cls.snapshot(fields)
+			if (wm_class is None or record.wm_class == wm_class)
+				and (pid is None or record.pid == pid)
+				and (title is None or match_title(title, record.title)))
+
 	@classmethod
 	def get_by_class(cls, wm_class):
 
-		for window in cls.list_windows():
-			if window.wm_class == wm_class:
-				return window
-		return None
+		windows = cls.find_all(wm_class=wm_class)
+		return windows[0] if windows else None
 
 	@classmethod
 	def get_by_title(cls, title):
 
-		for window in cls.list_windows():
-			if title in window.title:
-				return window
-		return None
+		windows = cls.find_all(title=title)
+		return windows[0] if windows else None
 
-	@property
-	def state(self):
+	@classmethod
+	def get_by_pid(cls, pid):
+
+		windows = cls.find_all(pid=pid)
+		return windows[0] if windows else None
+
+	@staticmethod
+	def fetch_state(xwindow):
 
-		min_state = self.xwindow.get_full_property(WM_STATE, X.AnyPropertyType)
+		min_state = xwindow.get_full_property(WM_STATE, X.AnyPropertyType)
 		if min_state.value[0] == Xutil.IconicState:
 			return WindowState.MINIMIZED
-		max_state = self.xwindow.get_full_property(
-			NET_WM_STATE, X.AnyPropertyType)
+		max_state = xwindow.get_full_property(NET_WM_STATE, X.AnyPropertyType)
 		if (NET_WM_STATE_MAXIMIZED_VERT in max_state.value
 				and NET_WM_STATE_MAXIMIZED_HORZ in max_state.value):
 			return WindowState.MAXIMIZED
 		return WindowState.NORMAL
 
+	@property
+	def state(self):
+
+		return self.cached('state', self.fetch_state)
+
+	@staticmethod
+	def fetch_geometry(xwindow):
+
+		geometry = xwindow.get_geometry()
+		return WinGeometry(
+			geometry.x, geometry.y, geometry.width, geometry.height)
+
 	@property
 	def position(self):
 
-		geometry = self.xwindow.get_geometry()
+		geometry = self.cached('geometry', self.fetch_geometry)
 		return WinPos(geometry.x, geometry.y)
 
 	@property
 	def size(self):
 
-		geometry = self.xwindow.get_geometry()
+		geometry = self.cached('geometry', self.fetch_geometry)
 		return WinSize(geometry.width, geometry.height)
 
 	def client_message(self, atom, data):
@@ -31,6 +31,7 @@ class Key(tuple, UndefEnum):
 	__value_type__ = tuple
 	__ec2vk__ = {}
 	__vk2ec__ = {}
+	__ec_table__ = None
 
 	KEY_RESERVED = (EC.KEY_RESERVED, None)
 	KEY_ESCAPE = (EC.KEY_ESC, VK.VK_ESCAPE)
@@ -699,6 +700,17 @@ class Key(tuple, UndefEnum):
 			.Key: A platform independent enum member.
 		"""
 
+		table = cls.__ec_table__
+		if table is None:
+			table = cls.__ec_table__ = [
+				cls._from_ec(event_code) for event_code in range(EC.KEY_CNT)]
+		if isinstance(event_code, int) and 0 <= event_code < len(table):
+			return table[event_code]
+		return cls._from_ec(event_code)
+
+	@classmethod
+	def _from_ec(cls, event_code):
+
 		if not isinstance(event_code, EC):
 			event_code = EC(event_code)
 		try:
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+import sys
+if sys.version_info >= (3, 6):
+	from enum import Enum, auto
+else:
+	from aenum import Enum, auto
+from functools import wraps
+from threading import Condition, current_thread
+from collections import deque
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
+from ..event import Event, PointerEventMotion
+from .tuples import QueueStats
+
+
+class QueuePolicy(Enum):
+	"""An enumeration describing what a hook does with new events once its
+	queue is full.
+
+	Attributes:
+		BLOCK: Wait for the callback to catch up. Events are dropped instead
+			when the hook shares its thread with the callback. On Windows
+			the oldest event is dropped instead, since a waiting hook stalls
+			all input.
+		DROP_OLDEST: Discard the event that waited longest.
+		COALESCE: Replace a waiting motion event with the next one, other
+			events block once the queue is full.
+	"""
+
+	BLOCK = auto()
+	DROP_OLDEST = auto()
+	COALESCE = auto()
+
+
+def is_motion(event):
+
+	return type(event) is PointerEventMotion
+
+
+def warn_slow(callback, threshold):
+
+	# Wraps callback to report calls that take longer than threshold seconds
+	@wraps(callback)
+	def timed(*args):
+
+		start = monotonic()
+		try:
+			return callback(*args)
+		finally:
+			elapsed = monotonic() - start
+			if elapsed > threshold:
+				print('Slow macpy callback: {0!r} took {1:.1f} ms'.format(
+					callback, elapsed * 1000))
+
+	return timed
+
+
+class HookQueue(object):
+	# Events of one hook waiting for the interface's mainloop. Only a single
+	# drain call sits in the mainloop queue at a time, so injected input is
+	# never held up behind a backlog of hook events and the backlog itself
+	# stays within maxsize. mergeable tells which events COALESCE may replace
+	# with a later one of the same kind. With an executor the drain runs on
+	# its workers instead, still one at a time so events keep their order.
+	# Hooks that must never wait, like the low level hooks of Windows which
+	# hold up input of the whole system, pass block=False to have BLOCK drop
+	# the oldest event instead.
+
+	def __init__(self, callback, dispatch, enqueue, maxsize=0,
+			policy=QueuePolicy.BLOCK, mergeable=is_motion, executor=None,
+			meter=None, block=True):
+
+		self.callback = callback
+		self.meter = meter
+		self.dispatch = dispatch
+		if executor is None:
+			self.enqueue = enqueue
+		else:
+			self.enqueue = executor.submit
+		self.maxsize = maxsize
+		self.policy = policy
+		self.mergeable = mergeable
+		self.block = block
+		self.cond = Condition()
+		self.events = deque()
+		self.scheduled = False
+		self.consumer = None
+		self.closed = False
+		self.queued = 0
+		self.dropped = 0
+		self.coalesced = 0
+
+	def push(self, event):
+
+		with self.cond:
+			if self.closed:
+				return
+			if (self.policy is QueuePolicy.COALESCE and self.events
+					and self.mergeable(event)
+					and self.mergeable(self.events[-1])):
+				self.events[-1] = event
+				self.coalesced += 1
+				return
+			if self.maxsize and len(self.events) >= self.maxsize:
+				if self.policy is QueuePolicy.DROP_OLDEST or not self.block:
+					self.events.popleft()
+					self.dropped += 1
+				elif current_thread() is self.consumer:
+					# Waiting here would wait for ourselves
+					self.dropped += 1
+					return
+				else:
+					while (len(self.events) >= self.maxsize
+							and not self.closed):
+						self.cond.wait(0.3)
+					if self.closed:
+						return
+			self.events.append(event)
+			self.queued += 1
+			if self.meter is not None:
+				self.meter.queued(len(self.events))
+			schedule = not self.scheduled
+			self.scheduled = True
+		if schedule:
+			self.enqueue(self.drain)
+
+	def drain(self):
+
+		# Handles what was queued when called and then goes to the back of
+		# the mainloop queue again, so calls queued meanwhile run first
+		self.consumer = current_thread()
+		with self.cond:
+			count = len(self.events)
+		for i in range(count):
+			with self.cond:
+				if not self.events:
+					break
+				event = self.events.popleft()
+				self.cond.notify()
+			meter = self.meter
+			if meter is not None:
+				self.dispatch(meter.dispatch, (self.callback, event))
+				continue
+			if isinstance(event, Event):
+				event.dispatch_time = monotonic()
+			self.dispatch(self.callback, (event, ))
+		with self.cond:
+			if self.events:
+				reschedule = True
+			else:
+				reschedule = self.scheduled = False
+		if reschedule:
+			self.enqueue(self.drain)
+
+	def close(self):
+
+		# Events already queued are still delivered
+		with self.cond:
+			self.closed = True
+			self.cond.notify_all()
+
+	def stats(self):
+
+		with self.cond:
+			return QueueStats(
+				self.queued, self.dropped, self.coalesced, len(self.events))
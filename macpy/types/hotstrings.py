@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+try:
+	from collections.abc import MutableMapping
+except ImportError:
+	from collections import MutableMapping
+from collections import deque
+from ..event import HotString
+
+
+class HotStrings(MutableMapping):
+	# Maps HotString objects to callbacks and matches typed characters
+	# against all of them with an Aho-Corasick automaton. Triggers are
+	# edges appended to the hotstring, so each character is a single
+	# transition. The automaton is rebuilt lazily after the set changes.
+
+	def __init__(self, maxlen=128):
+
+		self.callbacks = {}
+		self.input = deque(maxlen=maxlen)
+		self.state = 0
+		self.goto = None
+		self.fail = None
+		self.output = None
+
+	def __getitem__(self, hotstring):
+
+		return self.callbacks[hotstring]
+
+	def __setitem__(self, hotstring, callback):
+
+		if hotstring not in self.callbacks:
+			self.goto = None
+		self.callbacks[hotstring] = callback
+
+	def __delitem__(self, hotstring):
+
+		del self.callbacks[hotstring]
+		self.goto = None
+
+	def __iter__(self):
+
+		return iter(self.callbacks)
+
+	def __len__(self):
+
+		return len(self.callbacks)
+
+	def build(self):
+
+		goto = [{}]
+		output = [()]
+		for hotstring in self.callbacks:
+			if hotstring.triggers:
+				patterns = tuple(
+					(hotstring.string + trigger, trigger)
+					for trigger in hotstring.triggers)
+			else:
+				patterns = ((hotstring.string, None), )
+			for pattern, trigger in patterns:
+				node = 0
+				for char in pattern:
+					child = goto[node].get(char)
+					if child is None:
+						child = len(goto)
+						goto[node][char] = child
+						goto.append({})
+						output.append(())
+					node = child
+				output[node] += ((hotstring, trigger), )
+
+		fail = [0] * len(goto)
+		queue = deque(goto[0].values())
+		while queue:
+			node = queue.popleft()
+			for char, child in goto[node].items():
+				queue.append(child)
+				state = fail[node]
+				while state and char not in goto[state]:
+					state = fail[state]
+				fail[child] = goto[state].get(char, 0)
+				output[child] += output[fail[child]]
+
+		self.goto = goto
+		self.fail = fail
+		self.output = output
+		# Carry partially typed input over to the new automaton
+		self.state = 0
+		for char in self.input:
+			self.state = self.advance(self.state, char)
+
+	def advance(self, state, char):
+
+		goto = self.goto
+		fail = self.fail
+		while state and char not in goto[state]:
+			state = fail[state]
+		return goto[state].get(char, 0)
+
+	def feed(self, char):
+
+		if self.goto is None:
+			self.build()
+		self.state = self.advance(self.state, char)
+		matches = self.output[self.state]
+		if matches:
+			self.state = 0
+			self.input.clear()
+			return tuple(HotString(hotstring.string, hotstring.triggers, trigger)
+				for hotstring, trigger in matches)
+		self.input.append(char)
+		return ()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+from threading import Event as Flag, Lock, Timer
+try:
+	from queue import Queue
+except ImportError:
+	from Queue import Queue
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
+from ..event import KeyboardEvent, PointerEventButton
+
+
+def is_stop_key(event, stop_key):
+
+	if stop_key is None:
+		return False
+	if isinstance(event, KeyboardEvent):
+		return event.key == stop_key
+	if isinstance(event, PointerEventButton):
+		return event.button == stop_key
+	return False
+
+
+class RecordStream(object):
+	"""Iterator over recorded events as they arrive.
+
+	Returned by :func:`macpy.record_stream`. Iterating blocks until the
+	next event arrives and ends once the recording stopped. Used as
+	a context manager, leaving the block stops the recording.
+
+	Attributes:
+		stopped (:class:`threading.Event`): Set once the recording stopped.
+	"""
+
+	def __init__(self, interfaces, stop_key=None, timer=None):
+
+		self.interfaces = interfaces
+		self.stop_key = stop_key
+		self.stopped = Flag()
+		self.queue = Queue()
+		self.closed = False
+		self.lock = Lock()
+		self.timer = None
+		if timer is not None:
+			self.timer = Timer(timer, self.stop)
+			self.timer.daemon = True
+			self.timer.start()
+
+	def push(self, event):
+
+		if self.stopped.is_set():
+			return
+		if is_stop_key(event, self.stop_key):
+			self.stop()
+		else:
+			self.queue.put_nowait(event)
+
+	def stop(self):
+		"""Stop recording.
+
+		Events that arrived before are still yielded. This may be called
+		from any thread.
+		"""
+
+		if not self.stopped.is_set():
+			self.stopped.set()
+			self.queue.put_nowait(None)
+
+	def close(self):
+
+		self.stop()
+		with self.lock:
+			if self.closed:
+				return
+			self.closed = True
+		if self.timer is not None:
+			self.timer.cancel()
+		for interface in self.interfaces:
+			interface.close()
+
+	def __iter__(self):
+
+		try:
+			while True:
+				event = self.queue.get()
+				if event is None:
+					break
+				yield event
+		finally:
+			self.close()
+
+	def __enter__(self):
+
+		return self
+
+	def __exit__(self, exc_type, exc, traceback):
+
+		self.close()
+
+
+class FlightRecorder(object):
+	"""Keeps the most recent events in a fixed size ring buffer.
+
+	Returned by :func:`macpy.flight_recorder`. The buffer is allocated up
+	front and old events are overwritten, so memory use doesn't grow
+	however long the recorder runs.
+	"""
+
+	def __init__(self, interfaces, size, seconds=None):
+
+		self.interfaces = interfaces
+		self.size = size
+		self.seconds = seconds
+		self.ring = [None] * size
+		self.count = 0
+		self.lock = Lock()
+
+	def push(self, event):
+
+		# Keyboard and pointer events arrive on different threads
+		with self.lock:
+			self.ring[self.count % self.size] = event
+			self.count += 1
+
+	def snapshot(self):
+		"""Return the recorded events, oldest first.
+
+		Returns:
+			[~macpy.event.Event]: Up to size events, if seconds was given
+			only those from that many seconds before the call.
+		"""
+
+		with self.lock:
+			if self.count < self.size:
+				events = self.ring[:self.count]
+			else:
+				start = self.count % self.size
+				events = self.ring[start:] + self.ring[:start]
+		if self.seconds is not None:
+			since = monotonic() - self.seconds
+			for index, event in enumerate(events):
+				if event.time >= since:
+					return events[index:]
+			return []
+		return events
+
+	def close(self):
+		"""Stop recording. The buffer can still be read afterwards.
+		"""
+
+		for interface in self.interfaces:
+			interface.close()
+		self.interfaces = ()
+
+	def __enter__(self):
+
+		return self
+
+	def __exit__(self, exc_type, exc, traceback):
+
+		self.close()
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+
+import os
+import mmap
+import struct
+from itertools import chain
+from ..key import Key, KeyState
+from ..event import PointerAxis, KeyboardEvent, PointerEventMotion
+from ..event import PointerEventButton, PointerEventAxis
+from .tuples import MODIFIERS, LOCKS
+
+
+MAGIC = b'MACPYREC'
+VERSION = 1
+# Magic, version, record size and a reserved field
+HEADER = struct.Struct('<8sHHI')
+# Time, source time (NaN if unknown), axis value, x, y, char codepoint
+# (0 if none), event code (0xffff if none), kind, state, modifier bits,
+# lock bits, virtual keycode (0 if none) and axis, padded to 48 bytes.
+# Time comes first so it can be read without decoding the whole record.
+RECORD = struct.Struct('<dddiiIHBBBBBB4x')
+TIME = struct.Struct('<d')
+
+INDEX_MAGIC = b'MACPYIDX'
+INDEX_VERSION = 1
+# The sparse time index next to a recording starts with the same header,
+# the reserved field holding the number of events between checkpoints.
+# A checkpoint has the time and index of an event and indices of the
+# presses of keys and buttons held before it, so replay can restore them.
+# The count is OVERFLOW if more were held than fit.
+CHECKPOINT = struct.Struct('<dQH6x13Q')
+HELD_SLOTS = 13
+OVERFLOW = 0xffff
+INTERVAL = 4096
+
+KEYBOARD, MOTION, BUTTON, AXIS = range(1, 5)
+NO_EC = 0xffff
+NAN = float('nan')
+MODIFIER_BITS = {state: mask for mask, state in enumerate(MODIFIERS)}
+LOCK_BITS = {state: mask for mask, state in enumerate(LOCKS)}
+AXES = tuple(PointerAxis)
+KEYS = {}
+
+
+def encode(event):
+
+	source_time = event.source_time
+	if source_time is None:
+		source_time = NAN
+	modifiers = MODIFIER_BITS[event.modifiers]
+	if isinstance(event, KeyboardEvent):
+		key = event.key
+		char = event.char
+		return RECORD.pack(
+			event.time, source_time, 0.0, 0, 0,
+			ord(char) if char and len(char) == 1 else 0,
+			NO_EC if key.ec is None else key.ec, KEYBOARD, event.state.value,
+			modifiers, LOCK_BITS[event.locks], key.vk or 0, 0)
+	x, y = event.position
+	if isinstance(event, PointerEventMotion):
+		return RECORD.pack(
+			event.time, source_time, 0.0, x, y, 0, NO_EC, MOTION, 0,
+			modifiers, 0, 0, 0)
+	if isinstance(event, PointerEventButton):
+		button = event.button
+		return RECORD.pack(
+			event.time, source_time, 0.0, x, y, 0,
+			NO_EC if button.ec is None else button.ec, BUTTON,
+			event.state.value, modifiers, 0, button.vk or 0, 0)
+	if isinstance(event, PointerEventAxis):
+		return RECORD.pack(
+			event.time, source_time, event.value, x, y, 0, NO_EC, AXIS, 0,
+			modifiers, 0, 0, AXES.index(event.axis))
+	raise TypeError('Unsupported event')
+
+
+def held_key(event):
+
+	# What identifies a key or button while it's held, None for motion
+	if isinstance(event, KeyboardEvent):
+		return KeyboardEvent, event.key
+	if isinstance(event, PointerEventButton):
+		return PointerEventButton, event.button
+	return None
+
+
+def track(held, key, state, index):
+
+	if key is None:
+		return
+	if state:
+		held.setdefault(key, index)
+	else:
+		held.pop(key, None)
+
+
+def restate(event, state, time):
+
+	# A copy of a key or button event with another state
+	if isinstance(event, KeyboardEvent):
+		copy = KeyboardEvent(
+			event.key, state, event.char if state else None, event.modifiers,
+			event.locks)
+	else:
+		copy = PointerEventButton(
+			event.position.x, event.position.y, event.button, state,
+			event.modifiers)
+	copy.time = time
+	return copy
+
+
+def find(time_at, time, lo, hi, after=False):
+
+	# First index in [lo, hi) whose event isn't older than time, or is
+	# newer than it if after is set
+	while lo < hi:
+		mid = (lo + hi) // 2
+		mid_time = time_at(mid)
+		if mid_time < time or after and mid_time == time:
+			lo = mid + 1
+		else:
+			hi = mid
+	return lo
+
+
+def decode_key(code, vk):
+
+	# Both codes are looked up, since keys may share one of them
+	try:
+		return KEYS[code, vk]
+	except KeyError:
+		key = KEYS[code, vk] = Key(
+			(None if code == NO_EC else code, vk or None))
+		return key
+
+
+def decode(buffer, offset):
+
+	(etime, source_time, value, x, y, char, code, kind, state, modifiers,
+		locks, vk, axis) = RECORD.unpack_from(buffer, offset)
+	if kind == KEYBOARD:
+		event = KeyboardEvent(
+			decode_key(code, vk), KeyState(bool(state)),
+			chr(char) if char else None, modifiers, locks)
+	elif kind == MOTION:
+		event = PointerEventMotion(x, y, modifiers)
+	elif kind == BUTTON:
+		event = PointerEventButton(
+			x, y, decode_key(code, vk), KeyState(bool(state)), modifiers)
+	elif kind == AXIS:
+		event = PointerEventAxis(x, y, value, AXES[axis], modifiers)
+	else:
+		raise ValueError('Corrupt record at offset {0}'.format(offset))
+	event.time = etime
+	# NaN is the only value not equal to itself
+	event.source_time = source_time if source_time == source_time else None
+	return event
+
+
+class RecordingWriter(object):
+	"""Writes events to a recording file as they come.
+
+	Keyboard and pointer events are stored as fixed size records of 48
+	bytes, which :class:`Recording` reads back. Unless interval is 0,
+	a sparse time index is written along in a file named like
+	the recording with ``.idx`` appended. Used as a context manager,
+	leaving the block closes the files.
+	"""
+
+	def __init__(self, filename, interval=INTERVAL):
+		"""Create the recording file, replacing an existing one.
+
+		Args:
+			filename (str): Path of the file to write.
+			interval (int): Number of events between entries of the time
+				index.
+		"""
+
+		self.file = open(filename, 'wb')
+		self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+		self.count = 0
+		self.interval = interval
+		self.held = {}
+		self.index = None
+		if interval:
+			self.index = open(filename + '.idx', 'wb')
+			self.index.write(HEADER.pack(
+				INDEX_MAGIC, INDEX_VERSION, CHECKPOINT.size, interval))
+		elif os.path.exists(filename + '.idx'):
+			# It would belong to the recording replaced
+			os.remove(filename + '.idx')
+
+	def write(self, event):
+		"""Append an event to the recording.
+
+		Args:
+			event (~macpy.event.Event): A keyboard or pointer event.
+		Raises:
+			TypeError: If the event can't be stored.
+		"""
+
+		data = encode(event)
+		if self.index is not None and not self.count % self.interval:
+			self.index.write(
+				pack_checkpoint(event.time, self.count, self.held.values()))
+		self.file.write(data)
+		track(self.held, held_key(event), getattr(event, 'state', None),
+			self.count)
+		self.count += 1
+
+	def flush(self):
+		"""Write buffered events out to the file.
+		"""
+
+		self.file.flush()
+		if self.index is not None:
+			self.index.flush()
+
+	def close(self):
+
+		self.file.close()
+		if self.index is not None:
+			self.index.close()
+
+	def __enter__(self):
+
+		return self
+
+	def __exit__(self, exc_type, exc, traceback):
+
+		self.close()
+
+
+def pack_checkpoint(time, index, held):
+
+	held = sorted(held)
+	if len(held) > HELD_SLOTS:
+		return CHECKPOINT.pack(time, index, OVERFLOW, *[0] * HELD_SLOTS)
+	return CHECKPOINT.pack(
+		time, index, len(held), *held + [0] * (HELD_SLOTS - len(held)))
+
+
+def unpack_checkpoint(data, offset=0):
+
+	fields = CHECKPOINT.unpack_from(data, offset)
+	time, index, count = fields[:3]
+	if count == OVERFLOW:
+		return time, index, None
+	return time, index, fields[3:3 + count]
+
+
+class Recording(object):
+	"""A recording file written by :class:`RecordingWriter`.
+
+	The file is memory mapped and records are only decoded when accessed,
+	so recordings larger than memory can be replayed. Events are accessed
+	by index or by iterating, which is what :func:`macpy.replay` does.
+	Used as a context manager, leaving the block closes the file.
+	"""
+
+	def __init__(self, filename):
+		"""Open a recording file.
+
+		Args:
+			filename (str): Path of the file to read.
+		Raises:
+			ValueError: If the file isn't a recording this version of macpy
+				can read.
+		"""
+
+		self.filename = filename
+		self.file = open(filename, 'rb')
+		try:
+			header = self.file.read(HEADER.size)
+			if len(header) < HEADER.size:
+				raise ValueError('Not a macpy recording')
+			magic, version, size, reserved = HEADER.unpack(header)
+			if magic != MAGIC:
+				raise ValueError('Not a macpy recording')
+			if version != VERSION or size != RECORD.size:
+				raise ValueError(
+					'Unsupported recording version {0}'.format(version))
+			self.map = mmap.mmap(
+				self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		except Exception:
+			self.file.close()
+			raise
+		# A partly written last record is ignored
+		self.count = (len(self.map) - HEADER.size) // RECORD.size
+		self.interval = None
+		self.checkpoints = None
+
+	def offset(self, index):
+
+		if index < 0:
+			index += self.count
+		if not 0 <= index < self.count:
+			raise IndexError('Recording index out of range')
+		return HEADER.size + index * RECORD.size
+
+	def time(self, index):
+		"""Return the timestamp of an event without decoding it.
+
+		Args:
+			index (int): Index of the event.
+		Returns:
+			float: The timestamp.
+		"""
+
+		return TIME.unpack_from(self.map, self.offset(index))[0]
+
+	def load_index(self):
+
+		# Reads the index written along with the recording or, if there is
+		# none, builds one by reading every record once
+		checkpoints = []
+		try:
+			with open(self.filename + '.idx', 'rb') as index:
+				data = index.read()
+			magic, version, size, interval = HEADER.unpack_from(data)
+			if (magic != INDEX_MAGIC or version != INDEX_VERSION
+					or size != CHECKPOINT.size or not interval):
+				raise ValueError('Not a macpy recording index')
+			for offset in range(
+					HEADER.size, len(data) - size + 1, size):
+				checkpoint = unpack_checkpoint(data, offset)
+				if checkpoint[1] >= self.count:
+					break
+				checkpoints.append(checkpoint)
+		except (IOError, OSError, ValueError, struct.error):
+			interval = INTERVAL
+			held = {}
+			for index in range(self.count):
+				offset = HEADER.size + index * RECORD.size
+				if not index % interval:
+					checkpoints.append(unpack_checkpoint(pack_checkpoint(
+						TIME.unpack_from(self.map, offset)[0], index,
+						held.values())))
+				track(held, *self.held_key(offset), index=index)
+		self.interval = interval
+		self.checkpoints = checkpoints
+
+	def held_key(self, offset):
+
+		fields = RECORD.unpack_from(self.map, offset)
+		code, kind, state = fields[6:9]
+		if kind == KEYBOARD or kind == BUTTON:
+			return (kind, code, fields[11]), state
+		return None, state
+
+	def find(self, time, after=False):
+		"""Return the index of the first event not older than time.
+
+		This is a binary search over the time index and then the records
+		between two of its entries.
+
+		Args:
+			time (float): The timestamp to look for.
+			after (bool): Find the first event newer than time instead.
+		Returns:
+			int: The index, equal to the length if there is no such event.
+		"""
+
+		if self.checkpoints is None:
+			self.load_index()
+		checkpoints = self.checkpoints
+
+		def checkpoint_time(position):
+
+			return checkpoints[position][0]
+
+		position = find(
+			checkpoint_time, time, 0, len(checkpoints), after) - 1
+		if position < 0:
+			return 0
+		lo = checkpoints[position][1]
+		if position + 1 < len(checkpoints):
+			hi = checkpoints[position + 1][1]
+		else:
+			hi = self.count
+		return find(self.time, time, lo, hi, after)
+
+	def held(self, index):
+		"""Return the presses of keys and buttons held before an event.
+
+		Args:
+			index (int): Index of the event.
+		Returns:
+			[~macpy.event.Event]: The events that pressed them, in the order
+			they were pressed.
+		"""
+
+		if self.checkpoints is None:
+			self.load_index()
+		position = min(index // self.interval, len(self.checkpoints) - 1)
+		held = {}
+		start = 0
+		while position >= 0:
+			checkpoint = self.checkpoints[position]
+			if checkpoint[2] is not None:
+				start = checkpoint[1]
+				for press in checkpoint[2]:
+					held[self.held_key(self.offset(press))[0]] = press
+				break
+			position -= 1
+		for position in range(start, min(index, self.count)):
+			track(held, *self.held_key(self.offset(position)),
+				index=position)
+		return [self[press] for press in sorted(held.values())]
+
+	def events(self, start=0, stop=None):
+		"""Iterate over a range of events, decoding them as they're needed.
+
+		Args:
+			start (int): Index of the first event.
+			stop (int): Index after the last event, by default the end of
+				the recording.
+		"""
+
+		if stop is None or stop > self.count:
+			stop = self.count
+		buffer = self.map
+		for offset in range(
+				HEADER.size + start * RECORD.size,
+				HEADER.size + stop * RECORD.size, RECORD.size):
+			yield decode(buffer, offset)
+
+	def __len__(self):
+
+		return self.count
+
+	def __getitem__(self, index):
+
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(self.count))]
+		return decode(self.map, self.offset(index))
+
+	def __iter__(self):
+
+		return self.events()
+
+	def close(self):
+
+		self.map.close()
+		self.file.close()
+
+	def __enter__(self):
+
+		return self
+
+	def __exit__(self, exc_type, exc, traceback):
+
+		self.close()
+
+
+def select(events, start=None, end=None):
+	"""Return the events between start and end seconds after the first event.
+
+	They are preceded by presses of keys and buttons held at start and
+	followed by releases of those still held at end, so they can be
+	replayed on their own.
+
+	Args:
+		events ([~macpy.event.Event]): A sequence of events or
+			a :class:`Recording`.
+		start (float): Seconds after the first event to start at.
+		end (float): Seconds after the first event to end at.
+	Returns:
+		An iterable of events.
+	"""
+
+	if isinstance(events, Recording):
+		time_at = events.time
+		search = events.find
+		held = events.held
+		between = events.events
+	else:
+		if not hasattr(events, '__getitem__'):
+			events = list(events)
+
+		def time_at(index):
+
+			return events[index].time
+
+		def search(time, after=False):
+
+			return find(time_at, time, 0, len(events), after)
+
+		def held(index):
+
+			presses = {}
+			for position, event in enumerate(events[:index]):
+				track(presses, held_key(event), getattr(event, 'state', None),
+					position)
+			return [events[position] for position in sorted(presses.values())]
+
+		def between(begin, stop):
+
+			return events[begin:stop]
+
+	if not len(events):
+		return iter(())
+	first = time_at(0)
+	begin = 0 if start is None else search(first + start)
+	stop = len(events) if end is None else search(first + end, True)
+	if begin >= stop:
+		return iter(())
+	# Timed like the first and last event replayed
+	presses = [
+		restate(event, KeyState.PRESSED, time_at(begin))
+		for event in held(begin)]
+	releases = [
+		restate(event, KeyState.RELEASED, time_at(stop - 1))
+		for event in held(stop)]
+	return chain(presses, between(begin, stop), releases)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import time
+from collections import namedtuple
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
+from ..platform import PLATFORM, Platform
+from .meter import Histogram
+
+
+# How many events were replayed, in how many seconds, a histogram of how
+# late they were sent and how late the last one was
+ReplayStats = namedtuple(
+	'ReplayStats', ('events', 'duration', 'lateness', 'drift'))
+
+# Sleeping wakes up late by up to a scheduler tick, so the last stretch
+# before an event is spent spinning instead. Windows ticks every 15.6 ms.
+if PLATFORM is Platform.WINDOWS:
+	SPIN = 0.016
+else:
+	SPIN = 0.002
+MAX_SPIN = 0.05
+
+
+class Scheduler(object):
+	# Waits until each event is due at the time it was recorded at relative
+	# to the first one, divided by speed. Due times are counted from when
+	# the first event was sent, not from the event before, so a late event
+	# doesn't delay the ones after it and errors don't add up.
+
+	def __init__(self, speed=1.0, spin=SPIN):
+
+		if speed <= 0:
+			raise ValueError('Speed must be positive')
+		self.speed = speed
+		self.spin = spin
+		self.margin = spin
+		self.first = None
+		self.started = None
+		self.lateness = Histogram()
+		self.drift = 0.0
+
+	def wait(self, event_time):
+
+		now = monotonic()
+		if self.first is None:
+			self.first = event_time
+			self.started = now
+		due = self.started + (event_time - self.first) / self.speed
+		if due - now > self.margin:
+			wake = due - self.margin
+			time.sleep(wake - now)
+			now = monotonic()
+			# Spin longer while sleeps overshoot by more than that, the
+			# margin shrinks back as they stop doing so
+			self.margin = min(
+				max(self.spin, self.margin * 0.99, now - wake), MAX_SPIN)
+		while now < due:
+			now = monotonic()
+		self.drift = now - due
+		self.lateness.record(self.drift)
+
+	def stats(self):
+
+		if self.started is None:
+			return ReplayStats(0, 0.0, self.lateness, 0.0)
+		return ReplayStats(
+			self.lateness.count, monotonic() - self.started, self.lateness,
+			self.drift)
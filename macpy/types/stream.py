@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import asyncio
+from collections import deque
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
+
+
+def running_loop():
+
+	# Unlike get_event_loop() this never creates a loop
+	try:
+		get_running_loop = asyncio.get_running_loop
+	except AttributeError:
+		# Python 3.6 only has the private function
+		return asyncio._get_running_loop()
+	try:
+		return get_running_loop()
+	except RuntimeError:
+		return None
+
+
+def resolve(future):
+
+	if not future.done():
+		future.set_result(None)
+
+
+def completion(interface):
+
+	# An awaitable that resolves once everything the interface queued so
+	# far has run, or None when not called from a running asyncio loop
+	loop = running_loop()
+	if loop is None:
+		return None
+	future = loop.create_future()
+	interface.enqueue(loop.call_soon_threadsafe, resolve, future)
+	return future
+
+
+class EventStream(object):
+	# Async iterator over the events of a hook. push() runs on the loop's
+	# thread; when the hook reads its source on that loop too, reading
+	# is paused while maxlen events wait to be consumed.
+
+	def __init__(self, loop, close, maxlen=256):
+
+		self.loop = loop
+		self.on_close = close
+		self.maxlen = maxlen
+		self.events = deque()
+		self.waiter = None
+		self.reader = None
+		self.paused = False
+		self.closed = False
+
+	def push(self, event):
+
+		if self.closed:
+			return
+		waiter = self.waiter
+		self.waiter = None
+		if waiter is not None and not waiter.done():
+			event.dispatch_time = monotonic()
+			waiter.set_result(event)
+			return
+		self.events.append(event)
+		if (self.reader is not None and not self.paused
+				and len(self.events) >= self.maxlen):
+			self.paused = True
+			self.reader.pause()
+
+	def push_threadsafe(self, event):
+
+		self.loop.call_soon_threadsafe(self.push, event)
+
+	def __aiter__(self):
+
+		return self
+
+	def __anext__(self):
+
+		future = self.loop.create_future()
+		if self.events:
+			event = self.events.popleft()
+			event.dispatch_time = monotonic()
+			future.set_result(event)
+			if self.paused and len(self.events) <= self.maxlen // 2:
+				self.paused = False
+				self.reader.resume()
+		elif self.closed:
+			future.set_exception(StopAsyncIteration())
+		else:
+			self.waiter = future
+		return future
+
+	def __aenter__(self):
+
+		future = self.loop.create_future()
+		future.set_result(self)
+		return future
+
+	def __aexit__(self, exc_type, exc, traceback):
+
+		self.close()
+		future = self.loop.create_future()
+		future.set_result(False)
+		return future
+
+	def close(self):
+
+		if self.closed:
+			return
+		self.closed = True
+		self.events.clear()
+		self.on_close()
+		waiter = self.waiter
+		self.waiter = None
+		if waiter is not None and not waiter.done():
+			waiter.set_exception(StopAsyncIteration())
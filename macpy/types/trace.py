@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import os
+import json
+from functools import wraps
+from itertools import count
+from threading import Lock, local, current_thread
+try:
+	from time import monotonic
+except ImportError:
+	from monotonic import monotonic
+
+
+class Tracer(object):
+	# Collects spans of every macpy thread for the Chrome trace format.
+	# Each thread appends to a list only it writes to, the lock is taken
+	# once per thread to register that list. active is None while no
+	# trace runs, instrumented code checks it before taking any time.
+
+	active = None
+
+	def __init__(self):
+
+		self.lock = Lock()
+		self.local = local()
+		self.buffers = []
+		self.ids = count(1)
+		self.started = monotonic()
+
+	def buffer(self):
+
+		try:
+			return self.local.buffer
+		except AttributeError:
+			thread = current_thread()
+			buffer = self.local.buffer = []
+			with self.lock:
+				self.buffers.append((thread.ident, thread.name, buffer))
+			return buffer
+
+	def span(self, name, cat, start, end):
+
+		self.buffer().append(('X', name, cat, start, end - start, None))
+
+	def queued(self, method):
+
+		# Shows the time method waits in a queue as an async span that
+		# starts on the enqueuing and ends on the dispatching thread
+		span_id = next(self.ids)
+		name = getattr(method, '__qualname__', repr(method))
+		self.buffer().append(('b', name, 'queue', monotonic(), 0, span_id))
+
+		@wraps(method)
+		def dequeued(*args):
+
+			self.buffer().append(('e', name, 'queue', monotonic(), 0, span_id))
+			return method(*args)
+
+		return dequeued
+
+	def events(self):
+
+		pid = os.getpid()
+		yield {'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+			'args': {'name': 'macpy'}}
+		with self.lock:
+			buffers = list(self.buffers)
+		for tid, thread_name, buffer in buffers:
+			yield {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+				'args': {'name': thread_name}}
+			for phase, name, cat, start, duration, span_id in list(buffer):
+				event = {'name': name, 'cat': cat, 'ph': phase, 'pid': pid,
+					'tid': tid, 'ts': (start - self.started) * 1000000}
+				if phase == 'X':
+					event['dur'] = duration * 1000000
+				else:
+					event['id'] = span_id
+				yield event
+
+	def write(self, filename):
+
+		events = list(self.events())
+		with open(filename, 'w') as trace_file:
+			json.dump(
+				{'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+		return len(events)
+
+
+def call(method, args, cat='mainloop'):
+
+	# Runs a queued call, as a span named after method if a trace runs
+	tracer = Tracer.active
+	if tracer is None:
+		return method(*args)
+	start = monotonic()
+	try:
+		return method(*args)
+	finally:
+		tracer.span(
+			getattr(method, '__qualname__', repr(method)), cat,
+			start, monotonic())
+
+
+def traced(name, cat):
+
+	# Decorator recording every call as a span while a trace runs
+	def decorate(method):
+
+		@wraps(method)
+		def wrapper(*args):
+
+			tracer = Tracer.active
+			if tracer is None:
+				return method(*args)
+			start = monotonic()
+			try:
+				return method(*args)
+			finally:
+				tracer.span(name, cat, start, monotonic())
+
+		return wrapper
+
+	return decorate
@@ -4,12 +4,29 @@ from collections import namedtuple
 
 
 MousePos = namedtuple('PointerPosition', ('x', 'y'))
+# Pickle looks namedtuples up by their name
+PointerPosition = MousePos
 Modifiers = namedtuple('Modifiers', ('SHIFT', 'ALTGR', 'CTRL', 'ALT', 'META'))
 Locks = namedtuple('Locks', ('NUMLOCK', 'CAPSLOCK', 'SCROLLLOCK'))
+# Every possible modifier/lock state, indexed by a bitmask where bit n is
+# the nth field, so events can share instead of allocate them
+MODIFIERS = tuple(
+	Modifiers(*(bool(mask & (1 << bit)) for bit in range(5)))
+	for mask in range(1 << 5))
+LOCKS = tuple(
+	Locks(*(bool(mask & (1 << bit)) for bit in range(3)))
+	for mask in range(1 << 3))
 
 
 WinPos = namedtuple('WindowPosition', ('x', 'y'))
 WinSize = namedtuple('WindowSize', ('width', 'height'))
+WinGeometry = namedtuple('WindowGeometry', ('x', 'y', 'width', 'height'))
+WindowRecord = namedtuple(
+	'WindowRecord', ('id', 'title', 'wm_class', 'pid', 'geometry', 'state'))
+WindowRecord.__new__.__defaults__ = (None, ) * 5
+CacheStats = namedtuple('CacheStats', ('hits', 'misses', 'invalidations'))
+QueueStats = namedtuple(
+	'QueueStats', ('queued', 'dropped', 'coalesced', 'pending'))
 
 
 # Windows specific
@@ -10,6 +10,8 @@ else:
 
 class UndefEnum(Enum):
 
+	__undef_max__ = 1024
+
 	@classmethod
 	def _missing_(cls, value):
 
@@ -18,6 +20,19 @@ class UndefEnum(Enum):
 				raise ValueError(
 					'{0} is not a valid {1}'.format(value, cls.__name__))
 
+		# Undefined members are cached per class, so repeated unknown
+		# values don't build a new pseudo-member every time
+		cache = cls.__dict__.get('__undefined__')
+		if cache is None:
+			cache = {}
+			setattr(cls, '__undefined__', cache)
+		try:
+			return cache[value]
+		except KeyError:
+			pass
+		except TypeError:
+			cache = None
+
 		metacls = cls.__class__
 		bases = cls.__mro__
 
@@ -62,6 +77,8 @@ class UndefEnum(Enum):
 		undef_member.__objclass__ = cls
 		undef_member.__init__(*args)
 
+		if cache is not None and len(cache) < cls.__undef_max__:
+			cache[value] = undef_member
 		return undef_member
 
 
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import os
+from threading import Lock
+
+
+class Wakeup(object):
+	# Self-pipe used to interrupt a select() call from another thread.
+
+	def __init__(self):
+
+		self.lock = Lock()
+		self.rfd, self.wfd = os.pipe()
+		os.set_blocking(self.rfd, False)
+		os.set_blocking(self.wfd, False)
+		self.closed = False
+
+	def fileno(self):
+
+		return self.rfd
+
+	def set(self):
+
+		with self.lock:
+			if not self.closed:
+				try:
+					os.write(self.wfd, b'\0')
+				except BlockingIOError:
+					pass  # Pipe is full, reader will wake up anyway
+
+	def clear(self):
+
+		try:
+			while os.read(self.rfd, 512):
+				pass
+		except BlockingIOError:
+			pass
+
+	def close(self):
+
+		with self.lock:
+			if not self.closed:
+				self.closed = True
+				os.close(self.rfd)
+				os.close(self.wfd)
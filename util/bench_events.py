@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+# Build a recording of keyboard and pointer events the way the hooks do
+# and report the time and memory it takes. Modifier and lock state is
+# passed as dicts on trees without the interned state tables, so the
+# script can be run on two checkouts to compare event layouts.
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--events', type=int, default=1000000)
+	args = parser.parse_args()
+
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	from macpy.key import Key, KeyState
+	from macpy.event import KeyboardEvent, PointerEventMotion
+
+	try:
+		from macpy.types.tuples import MODIFIERS, LOCKS
+	except ImportError:
+		mod_names = ('SHIFT', 'ALTGR', 'CTRL', 'ALT', 'META')
+		lock_names = ('NUMLOCK', 'CAPSLOCK', 'SCROLLLOCK')
+		MODIFIERS = [
+			{name: bool(mask >> bit & 1) for bit, name in enumerate(mod_names)}
+			for mask in range(32)]
+		LOCKS = [
+			{name: bool(mask >> bit & 1) for bit, name in enumerate(lock_names)}
+			for mask in range(8)]
+	keys = (Key.KEY_A, Key.KEY_S, Key.KEY_D, Key.KEY_F)
+	states = (KeyState.PRESSED, KeyState.RELEASED)
+
+	def events(count):
+
+		for i in range(count):
+			mods = MODIFIERS[i & 31]
+			locks = LOCKS[i >> 5 & 7]
+			if i & 1:
+				yield PointerEventMotion(i & 0x7ff, i >> 11 & 0x7ff, mods)
+			else:
+				yield KeyboardEvent(
+					keys[i >> 1 & 3], states[i >> 3 & 1], None, mods, locks)
+
+	start = time.perf_counter()
+	recording = list(events(args.events))
+	elapsed = time.perf_counter() - start
+	del recording
+
+	tracemalloc.start()
+	recording = list(events(args.events))
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	print('events:    {0:,}'.format(len(recording)))
+	print('build:     {0:.3f} s ({1:,.0f} events/s)'.format(
+		elapsed, args.events / elapsed))
+	print('retained:  {0:.1f} MiB ({1:.0f} B/event)'.format(
+		current / 2 ** 20, current / args.events))
+	print('peak:      {0:.1f} MiB'.format(peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+	main()
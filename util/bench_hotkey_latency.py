@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# Measure the time from a synthetic KeyPress to the hotkey callback.
+# Runs against a private Xvfb server unless DISPLAY is given with --display.
+
+import os
+import sys
+import time
+import argparse
+from threading import Event
+from subprocess import Popen, DEVNULL
+
+
+def percentile(samples, pct):
+
+	index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+	return samples[index]
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--display', default=None)
+	parser.add_argument('--count', type=int, default=500)
+	parser.add_argument('--interval', type=float, default=0.01)
+	args = parser.parse_args()
+
+	xvfb = None
+	if args.display is None:
+		args.display = ':97'
+		xvfb = Popen(['Xvfb', args.display, '-nolisten', 'tcp'],
+			stdout=DEVNULL, stderr=DEVNULL)
+		time.sleep(1)
+	os.environ['DISPLAY'] = args.display
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	from Xlib import display, X
+	from Xlib.ext import xtest
+	from macpy import Keyboard, Key
+
+	fired = Event()
+	stamps = []
+
+	def callback(hotkey):
+
+		stamps.append(time.perf_counter())
+		fired.set()
+
+	keyboard = Keyboard()
+	keyboard.init_hotkeys()
+	keyboard.register_hotkey(Key.KEY_F12, (), callback)
+	time.sleep(0.5)
+
+	injector = display.Display(args.display)
+	keycode = injector.keysym_to_keycode(0xffc9)  # XK_F12
+	samples = []
+	try:
+		for i in range(args.count):
+			fired.clear()
+			start = time.perf_counter()
+			xtest.fake_input(injector, X.KeyPress, keycode)
+			xtest.fake_input(injector, X.KeyRelease, keycode)
+			injector.flush()
+			if fired.wait(2):
+				samples.append((stamps[-1] - start) * 1000)
+			time.sleep(args.interval)
+	finally:
+		keyboard.close()
+		injector.close()
+		if xvfb:
+			xvfb.terminate()
+
+	samples.sort()
+	print('hotkeys: {0}/{1} delivered'.format(len(samples), args.count))
+	if samples:
+		for pct in (0, 50, 90, 99, 100):
+			print('p{0:<3} {1:8.3f} ms'.format(pct, percentile(samples, pct)))
+
+
+if __name__ == '__main__':
+	main()
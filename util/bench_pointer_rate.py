@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+# Replay a synthetic 1 kHz relative motion stream through a uinput mouse
+# while an EvPointer hook is installed, and report how many events were
+# delivered and how much CPU the process used. Needs access to
+# /dev/uinput and /dev/input/event*, and a running X or Wayland session.
+
+import os
+import sys
+import time
+import argparse
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--rate', type=int, default=1000)
+	parser.add_argument('--seconds', type=float, default=10)
+	args = parser.parse_args()
+
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	from evdev import UInput, ecodes
+	from macpy.interface.evpointer import EvPointer
+
+	caps = {
+		ecodes.EV_REL: (ecodes.REL_X, ecodes.REL_Y),
+		ecodes.EV_KEY: (ecodes.BTN_LEFT, ecodes.BTN_RIGHT)}
+	mouse = UInput(caps, name='macpy bench mouse')
+	# libinput only picks up devices that exist when EvPointer starts
+	time.sleep(0.5)
+
+	received = [0]
+
+	def callback(event):
+
+		received[0] += 1
+
+	pointer = EvPointer()
+	pointer.install_pointer_hook(callback)
+	time.sleep(0.5)
+
+	count = int(args.rate * args.seconds)
+	interval = 1 / args.rate
+	cpu = time.process_time()
+	start = time.perf_counter()
+	try:
+		for i in range(count):
+			delta = 1 if i % 200 < 100 else -1
+			mouse.write(ecodes.EV_REL, ecodes.REL_X, delta)
+			mouse.syn()
+			deadline = start + (i + 1) * interval
+			while time.perf_counter() < deadline:
+				time.sleep(0)
+		time.sleep(0.5)
+		elapsed = time.perf_counter() - start
+		cpu = time.process_time() - cpu
+	finally:
+		pointer.uninstall_pointer_hook()
+		pointer.close()
+		mouse.close()
+
+	print('sent:      {0:,} events at {1} Hz'.format(count, args.rate))
+	print('received:  {0:,} events'.format(received[0]))
+	print('cpu:       {0:.2f} s ({1:.1f}% of {2:.1f} s)'.format(
+		cpu, cpu / elapsed * 100, elapsed))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Compare decoding RECORD replies with python-xlib's generic event parser,
+# as the hooks used to, against the struct based record_events(). Replies
+# are synthesized, so no X server is needed.
+
+import os
+import sys
+import time
+import random
+import struct
+import argparse
+
+
+class FakeDisplay(object):
+	# Just enough of Xlib's display for parsing events
+
+	def __init__(self, event_classes):
+
+		self.event_classes = event_classes
+
+	def get_resource_class(self, name, default=None):
+
+		return default
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--events', type=int, default=200000)
+	parser.add_argument('--per-reply', type=int, default=1)
+	args = parser.parse_args()
+
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	from Xlib import X
+	from Xlib.protocol import rq, event
+	from macpy.interface.xhelper import record_events
+
+	wire = struct.Struct('=BBHIIIIhhhhHBx')
+	random.seed(0)
+	replies = []
+	for i in range(args.events // args.per_reply):
+		data = b''.join(
+			wire.pack(
+				random.choice((X.KeyPress, X.KeyRelease, X.ButtonPress,
+					X.ButtonRelease, X.MotionNotify)),
+				random.randint(8, 255), i & 0xffff, i, 0x100, 0x100, 0,
+				random.randint(0, 1919), random.randint(0, 1079), 0, 0,
+				random.randint(0, 0xff), 1)
+			for j in range(args.per_reply))
+		replies.append(data)
+	total = len(replies) * args.per_reply
+	disp = FakeDisplay(event.event_class)
+
+	def xlib(data):
+
+		fields = []
+		while len(data):
+			ev, data = rq.EventField(None).parse_binary_value(
+				data, disp, None, None)
+			fields.append((ev.type, ev.detail, ev.time,
+				ev.root_x, ev.root_y, ev.state))
+		return fields
+
+	def fast(data):
+
+		return [(etype & 0x7f, detail, etime, root_x, root_y, state)
+			for etype, detail, etime, root_x, root_y, state
+			in record_events(data)]
+
+	for data in replies[:100]:
+		assert xlib(data) == fast(data)
+
+	results = []
+	for name, parse in (('python-xlib', xlib), ('record_events', fast)):
+		start = time.perf_counter()
+		for data in replies:
+			parse(data)
+		elapsed = time.perf_counter() - start
+		results.append(elapsed)
+		print('{0:>14}: {1:,.0f} events/s'.format(name, total / elapsed))
+	print('speedup: {0:.1f}x'.format(results[0] / results[1]))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# Compare the per call overhead of replay(), which sets up a Keyboard and
+# a Pointer every time, with a Replayer that keeps them. Replays a short
+# sequence without waiting, so this needs a display or input devices and
+# moves the pointer a little and taps shift.
+
+import os
+import sys
+import time
+import argparse
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--calls', type=int, default=200)
+	args = parser.parse_args()
+
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	import macpy
+	from macpy import Key, KeyState, KeyboardEvent, PointerEventMotion
+
+	events = [
+		PointerEventMotion(100, 100, 0),
+		KeyboardEvent(Key.KEY_LEFTSHIFT, KeyState.PRESSED, None, 0, 0),
+		KeyboardEvent(Key.KEY_LEFTSHIFT, KeyState.RELEASED, None, 0, 0),
+		PointerEventMotion(101, 100, 0)]
+
+	def fresh():
+
+		for i in range(args.calls):
+			macpy.replay(events, delay=0)
+
+	def session():
+
+		with macpy.Replayer() as replayer:
+			for i in range(args.calls):
+				replayer.replay(events, delay=0)
+
+	results = []
+	for name, run in (('replay()', fresh), ('Replayer', session)):
+		start = time.perf_counter()
+		run()
+		elapsed = time.perf_counter() - start
+		results.append(elapsed)
+		print('{0:>10}: {1:.3f} ms per call'.format(
+			name, elapsed / args.calls * 1000))
+	print('speedup: {0:.1f}x'.format(results[0] / results[1]))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# Measure XTranslate.keycode_to_keysym throughput and the cost of building
+# its lookup table. Runs against a private Xvfb server unless --display
+# is given.
+
+import os
+import sys
+import time
+import random
+import argparse
+from subprocess import Popen, DEVNULL
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--display', default=None)
+	parser.add_argument('--events', type=int, default=1000000)
+	args = parser.parse_args()
+
+	xvfb = None
+	if args.display is None:
+		args.display = ':96'
+		xvfb = Popen(['Xvfb', args.display, '-nolisten', 'tcp'],
+			stdout=DEVNULL, stderr=DEVNULL)
+		time.sleep(1)
+	os.environ['DISPLAY'] = args.display
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	from macpy.interface.xhelper import XTranslate
+
+	try:
+		translate = XTranslate.get()
+		start = time.perf_counter()
+		for i in range(10):
+			translate.map_table()
+		build = (time.perf_counter() - start) / 10
+
+		random.seed(0)
+		events = [
+			(random.randint(translate.min_keycode, translate.max_keycode),
+				random.randint(0, 0xffff))
+			for i in range(args.events)]
+		keycode_to_keysym = translate.keycode_to_keysym
+		start = time.perf_counter()
+		for keycode, state in events:
+			keycode_to_keysym(keycode, state)
+		elapsed = time.perf_counter() - start
+	finally:
+		if xvfb:
+			xvfb.terminate()
+
+	print('table build: {0:.2f} ms'.format(build * 1000))
+	print('translated: {0:,.0f} events/s'.format(args.events / elapsed))
+
+
+if __name__ == '__main__':
+	main()
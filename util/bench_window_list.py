@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# Time Window.list_windows() against a private Xvfb server for a growing
+# number of client windows and count the keymap fetches it causes.
+# There is no window manager, so _NET_CLIENT_LIST is maintained here.
+
+import os
+import sys
+import time
+import argparse
+from subprocess import Popen, DEVNULL
+
+
+def main():
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--display', default=None)
+	parser.add_argument('--repeat', type=int, default=20)
+	parser.add_argument(
+		'--windows', type=int, nargs='+', default=(10, 50, 150))
+	args = parser.parse_args()
+
+	xvfb = None
+	if args.display is None:
+		args.display = ':98'
+		xvfb = Popen(['Xvfb', args.display, '-nolisten', 'tcp'],
+			stdout=DEVNULL, stderr=DEVNULL)
+		time.sleep(1)
+	os.environ['DISPLAY'] = args.display
+	sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+	from Xlib import display, X, Xatom
+	from macpy import Window
+
+	fetches = [0]
+	get_keyboard_mapping = display.Display.get_keyboard_mapping
+
+	def counting_get_keyboard_mapping(self, *args, **kwargs):
+
+		fetches[0] += 1
+		return get_keyboard_mapping(self, *args, **kwargs)
+
+	display.Display.get_keyboard_mapping = counting_get_keyboard_mapping
+
+	wm = display.Display(args.display)
+	root = wm.screen().root
+	client_list = wm.intern_atom('_NET_CLIENT_LIST')
+	windows = []
+	try:
+		for count in args.windows:
+			while len(windows) < count:
+				window = root.create_window(
+					0, 0, 100, 100, 0, X.CopyFromParent)
+				window.set_wm_class('bench', 'Bench')
+				window.set_wm_name('bench window {0}'.format(len(windows)))
+				windows.append(window)
+			root.change_property(
+				client_list, Xatom.WINDOW, 32, [w.id for w in windows])
+			wm.sync()
+
+			fetches[0] = 0
+			start = time.perf_counter()
+			for i in range(args.repeat):
+				Window.list_windows()
+			elapsed = (time.perf_counter() - start) / args.repeat
+			print('{0:5d} windows: {1:8.3f} ms/call, {2} keymap fetches'.format(
+				count, elapsed * 1000, fetches[0]))
+	finally:
+		wm.close()
+		if xvfb:
+			xvfb.terminate()
+
+
+if __name__ == '__main__':
+	main()